@@ -0,0 +1,77 @@
+# Fan-out cost: a new thread per task per call vs the shared worker pool, and time to first result with as_completed
+# python benchmarks/async_tasks.py [calls] [tasks] [--latency MS]
+import time
+import argparse
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import env
+
+from slyguy import util, signals
+
+
+def threaded(tasks, workers=util.DEFAULT_WORKERS):
+    # async_tasks before the shared pool
+    def worker():
+        while not task_queue.empty():
+            task, index = task_queue.get_nowait()
+            try:
+                resp_queue.put([task(), index])
+            except Exception as e:
+                resp_queue.put([e, index])
+
+    task_queue = queue.Queue()
+    resp_queue = queue.Queue()
+    for i in range(len(tasks)):
+        task_queue.put([tasks[i], i])
+
+    threads = []
+    for i in range(min(workers, len(tasks))):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    results = [resp_queue.get() for i in range(len(tasks))]
+    for thread in threads:
+        thread.join()
+    return [x[0] for x in sorted(results, key=lambda x: x[1])]
+
+
+def run(name, func, calls, tasks, latency):
+    def call():
+        func([lambda: time.sleep(latency) for i in range(tasks)])
+
+    seconds, _ = env.timed(lambda: [call() for i in range(calls)])
+    print('{:<14} {:>5} calls x {:>3} tasks  {:>8.1f} ms  {:>7.3f} ms/call'.format(name, calls, tasks, seconds * 1000, seconds * 1000 / calls))
+
+
+def first_result(latency):
+    tasks = [lambda: time.sleep(latency * 10)] + [lambda: time.sleep(latency)] * 4
+
+    start = time.time()
+    util.async_tasks(tasks)
+    print('{:<14} first result after {:>7.1f} ms'.format('async_tasks', (time.time() - start) * 1000))
+
+    start = time.time()
+    for index, result in util.as_completed(tasks):
+        print('{:<14} first result after {:>7.1f} ms'.format('as_completed', (time.time() - start) * 1000))
+        break
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('calls', nargs='?', type=int, default=500)
+    parser.add_argument('tasks', nargs='?', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0, help='sleep per task in ms')
+    args = parser.parse_args()
+    latency = args.latency / 1000.0
+
+    run('thread/call', threaded, args.calls, args.tasks, latency)
+    run('pool', util.async_tasks, args.calls, args.tasks, latency)
+    first_result(max(latency, 0.02))
+    signals.emit(signals.AFTER_DISPATCH)
@@ -0,0 +1,61 @@
+# Compares cache db size and read latency for raw vs compressed pickle values
+# python benchmarks/cache_compression.py [rows]
+import os
+import sys
+import json
+import random
+
+import env
+
+import peewee
+from slyguy import database
+
+
+def payload(index):
+    # shaped like a disney explore set page
+    items = []
+    for i in range(30):
+        items.append({
+            'id': '{}-{}'.format(index, i),
+            'type': 'set_item',
+            'visuals': {
+                'title': 'Title {} {}'.format(index, i),
+                'description': {'full': 'A long description of the program. ' * 8, 'brief': 'Brief description.'},
+                'artwork': {name: {'imageId': '{:032x}'.format(random.getrandbits(128))} for name in ('tile', 'background', 'logo', 'thumbnail')},
+                'metastringParts': {'genres': {'values': ['Action', 'Adventure']}, 'ratingInfo': {'rating': {'text': 'PG'}}},
+            },
+            'actions': [{'type': 'playback', 'resourceId': '{:032x}'.format(random.getrandbits(128))}],
+        })
+    return {'data': {'set': {'items': items, 'pagination': {'hasMore': True}}}}
+
+
+def run(name, field, rows):
+    path = os.path.join(os.environ['KODI_HOME'], '{}.db'.format(name))
+
+    class Row(database.Model):
+        key = peewee.IntegerField(unique=True)
+        value = field
+
+    db = database.init([Row], path)
+    values = [payload(i) for i in range(rows)]
+
+    write_time, _ = env.timed(lambda: Row.bulk_create([Row(key=i, value=v) for i, v in enumerate(values)]))
+    db.execute_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+    size = os.path.getsize(path)
+    stored = db.execute_sql('SELECT SUM(LENGTH(value)) FROM "{}"'.format(Row._meta.table_name)).fetchone()[0]
+
+    keys = list(range(rows))
+    random.shuffle(keys)
+    read_time, _ = env.timed(lambda: [Row.get(Row.key == key).value for key in keys])
+    db.close()
+
+    print('{:<6} db: {:>8.1f} KB  values: {:>8.1f} KB  write: {:>6.2f} ms/row  read: {:>6.3f} ms/row'.format(
+        name, size / 1024.0, stored / 1024.0, write_time * 1000 / rows, read_time * 1000 / rows))
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print('{} rows of ~{} KB json'.format(rows, len(json.dumps(payload(0))) // 1024))
+    run('raw', database.PickleField(), rows)
+    run('zlib', database.CompressedPickleField(), rows)
+    run('lzma', database.CompressedPickleField(codec=database.CompressedPickleField.LZMA), rows)
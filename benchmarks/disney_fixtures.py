@@ -0,0 +1,304 @@
+# Synthetic Disney+ API responses in the shape the addon parses.
+# Used by disney_routes.py when no recorded fixture file is given.
+# Keys are "METHOD /path" (plus "#operationName" for graphql posts). {server} is replaced with the fixture server url.
+import json
+from base64 import b64encode
+
+from resources.lib.constants import CONFIG_URL
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+REGION = 'US'
+LANGUAGE = 'en-US'
+MATURITY = 1850
+PROFILE_ID = 'profile-1'
+SERIES_ID = 'series-1'
+SEASON_ID = 'season-1'
+CONTENT_ID = 'content-1'
+FAMILY_ID = 'family-1'
+PAGE_ID = 'page-1'
+QUERY = 'star'
+
+CONTENT = '/svc/content/{type}/version/{{apiVersion}}/region/{{region}}/audience/k-{{kidsModeEnabled}},l-true/maturity/{{impliedMaturityRating}}/language/{{appLanguage}}'
+EXPLORE = '/explore/{{version}}/{type}'
+
+
+def config():
+    def content(path):
+        return {'href': '{server}' + CONTENT.format(type=path)}
+
+    def explore(path):
+        return {'href': '{server}' + EXPLORE.format(type=path)}
+
+    return {'services': {
+        'orchestration': {'client': {'endpoints': {
+            'refreshToken': {'href': '{server}/graph/v1/device/graphql'},
+            'registerDevice': {'href': '{server}/graph/v1/device/graphql'},
+            'query': {'href': '{server}/v1/public/graphql'},
+        }}},
+        'content': {'client': {'endpoints': {
+            'getCollection': content('{collectionSubType}/contentClass/{contentClass}/slug/{slug}'),
+            'getSet': content('{setType}/setId/{setId}/pageSize/{pageSize}/page/{page}'),
+            'getCuratedSet': content('{setType}/setId/{setId}/pageSize/{pageSize}/page/{page}'),
+            'getCWSet': content('ContinueWatchingSet/setId/{setId}'),
+            'getDmcSeriesBundle': content('DmcSeriesBundle/encodedSeriesId/{encodedSeriesId}'),
+            'getDmcEpisodes': content('DmcEpisodes/seasonId/{seasonId}/pageSize/{pageSize}/page/{page}'),
+            'getDmcVideo': content('DmcVideo/contentId/{contentId}'),
+            'getDmcVideoBundle': content('DmcVideoBundle/encodedFamilyId/{encodedFamilyId}'),
+            'getUpNext': content('UpNext/contentId/{contentId}'),
+            'getAvatars': content('Avatars/avatarIds/{avatarIds}'),
+            'getSearchResults': content('search/query/{query}/queryType/{queryType}/pageSize/{pageSize}'),
+            'putItemInWatchlist': content('Watchlist/{refIdType}/{refId}'),
+            'deleteItemFromWatchlist': content('Watchlist/{refIdType}/{refId}'),
+        }}},
+        'explore': {'client': {'endpoints': {
+            'getPage': explore('page/{pageId}'),
+            'getSet': explore('set/{setId}'),
+            'getSeason': explore('season/{seasonId}'),
+            'search': explore('search'),
+            'getUpNext': explore('upNext'),
+            'getDeeplink': explore('deeplink'),
+        }}},
+        'media': {'client': {'endpoints': {
+            'mediaPayload': {'href': '{server}/v7/playback/{scenario}'},
+        }}},
+        'drm': {'client': {'endpoints': {
+            'widevineLicense': {'href': '{server}/widevine/v1/obtain-license'},
+        }}},
+        'telemetry': {'client': {'endpoints': {
+            'postEvent': {'href': '{server}/telemetry'},
+        }}},
+    }}
+
+
+def content_path(path, **kwargs):
+    args = {'apiVersion': '6.1', 'region': REGION, 'kidsModeEnabled': 'false', 'impliedMaturityRating': MATURITY, 'appLanguage': LANGUAGE}
+    args.update(kwargs)
+    return CONTENT.format(type=path).format(**args)
+
+
+def explore_path(path):
+    return EXPLORE.format(type=path).format(version='v1.1')
+
+
+def text(source, content, field='title', _type='full'):
+    return {field: {_type: {source: {'default': {'content': content}}}}}
+
+
+def texts(source, title, description=None):
+    data = text(source, title)
+    if description:
+        data.update(text(source, description, field='description', _type='medium'))
+    return data
+
+
+def image(seed):
+    def url(kind, ratio):
+        return {'default': {'url': 'https://disney.images.edge.bamgrid.com/ripcut-delivery/v1/variant/disney/{}-{}-{}'.format(seed, kind, ratio)}}
+    return {
+        'tile': {'1.78': {'program': url('tile', '1.78')}, '0.71': {'program': url('tile', '0.71')}},
+        'background': {'1.78': {'program': url('background', '1.78')}},
+        'title_treatment': {'2.00': {'program': url('logo', '2.00')}},
+        'hero_tile': {'3.91': {'program': url('hero', '3.91')}},
+    }
+
+
+def explore_art(seed):
+    def art(kind, ratio):
+        return {'imageId': '{}-{}-{}'.format(seed, kind, ratio)}
+    return {'standard': {
+        'tile': {'1.78': art('tile', '1.78'), '0.71': art('tile', '0.71')},
+        'background': {'1.78': art('background', '1.78')},
+        'title_treatment': {'2.00': art('logo', '2.00')},
+    }}
+
+
+def video(index, episode=False):
+    row = {
+        'type': 'DmcVideo',
+        'contentId': 'content-{}'.format(index),
+        'programId': 'program-{}'.format(index),
+        'programType': 'episode' if episode else 'movie',
+        'family': {'encodedFamilyId': 'family-{}'.format(index)},
+        'text': texts('program', 'Title {}'.format(index), 'A long description of the program. ' * 6),
+        'image': image('video-{}'.format(index)),
+        'releases': [{'releaseYear': 2020, 'releaseDate': '2020-01-01'}],
+        'mediaMetadata': {
+            'runtimeMillis': 2700000,
+            'facets': [{'activeAspectRatio': 1.78}],
+            'playbackUrls': [{'href': '{server}/media/' + 'content-{}'.format(index) + '/scenario/{scenario}'}],
+        },
+        'milestone': {
+            'intro_start': [{'milestoneTime': [{'startMillis': 60000}]}],
+            'intro_end': [{'milestoneTime': [{'startMillis': 120000}]}],
+            'up_next': [{'milestoneTime': [{'startMillis': 2600000}]}],
+        },
+        'originalLanguage': 'en',
+    }
+    if episode:
+        row.update({
+            'seasonSequenceNumber': 1,
+            'episodeSequenceNumber': index + 1,
+            'encodedSeriesId': SERIES_ID,
+            'seriesId': 'series-ref-1',
+        })
+        row['text'].update(text('series', 'Series 1'))
+    return row
+
+
+def series(index):
+    return {
+        'type': 'DmcSeries',
+        'encodedSeriesId': 'series-{}'.format(index),
+        'seriesId': 'series-ref-{}'.format(index),
+        'text': texts('series', 'Series {}'.format(index), 'A long description of the series. ' * 6),
+        'image': image('series-{}'.format(index)),
+        'releases': [{'releaseYear': 2019}],
+    }
+
+
+def explore_row(index, movie=True):
+    return {
+        'id': 'explore-{}'.format(index),
+        'type': 'set_item',
+        'infoBlock': b64encode('urn:disney:{}'.format(':movie' if movie else ':series').encode()).decode(),
+        'actions': [{'type': 'browse', 'pageId': 'entity-{}'.format(index)}],
+        'visuals': {
+            'title': 'Explore Title {}'.format(index),
+            'description': {'full': 'A long description of the program. ' * 6},
+            'metastringParts': {
+                'genres': {'values': ['Action', 'Adventure']},
+                'releaseYearRange': {'startYear': 2020},
+                'ratingInfo': {'rating': {'text': 'PG'}},
+            },
+            'artwork': explore_art('explore-{}'.format(index)),
+        },
+    }
+
+
+def explore_set(set_id, items, total=None):
+    return {
+        'id': set_id,
+        'type': 'set',
+        'visuals': {'name': 'Set {}'.format(set_id), 'title': 'Set {}'.format(set_id)},
+        'pagination': {'totalCount': len(items) if total is None else total, 'hasMore': False},
+        'items': items,
+    }
+
+
+def graph(operation, data=None, sdk=None):
+    body = {'data': data or {}}
+    if sdk:
+        body['extensions'] = {'sdk': sdk}
+    return body
+
+
+def build(items=60, sets=12, seasons=6, episodes=24):
+    fixtures = {}
+
+    def add(method, path, body, operation=None):
+        key = '{} {}'.format(method, path)
+        if operation:
+            key += '#' + operation
+        fixtures[key] = body
+
+    add('GET', urlparse(CONFIG_URL).path, config())
+
+    sdk = {
+        'featureFlags': {'wpnx-disney-searchOnExplore': True},
+        'token': {'accessToken': 'access-token', 'refreshToken': 'refresh-token', 'expiresIn': 14400},
+    }
+    add('POST', '/graph/v1/device/graphql', graph('refreshToken', sdk=sdk), 'refreshToken')
+
+    profile = {
+        'id': PROFILE_ID,
+        'name': 'Profile 1',
+        'attributes': {
+            'kidsModeEnabled': False,
+            'languagePreferences': {'appLanguage': LANGUAGE},
+            'playbackSettings': {'preferImaxEnhancedVersion': False},
+            'parentalControls': {'isPinProtected': False},
+            'avatar': {'id': 'avatar-1'},
+        },
+    }
+    add('POST', '/v1/public/graphql', graph('EntitledGraphMeQuery', data={'me': {
+        'account': {'activeProfile': {'id': PROFILE_ID}, 'profiles': [profile]},
+        'activeSession': {
+            'entitlements': ['DISNEY_PLUS_NO_ADS'],
+            'portabilityLocation': None,
+            'location': {'countryCode': REGION},
+            'preferredMaturityRating': None,
+        },
+    }}), 'EntitledGraphMeQuery')
+
+    containers = []
+    for i in range(sets):
+        set_id = 'set-{}'.format(i)
+        containers.append({'style': 'standard', 'set': {'type': 'CuratedSet', 'setId': set_id, 'text': texts('set', 'Set {}'.format(i))}})
+        rows = [video(i * items + j) if j % 2 else series(i * items + j) for j in range(items)]
+        add('GET', content_path('CuratedSet/setId/{setId}/pageSize/{pageSize}/page/{page}', setType='CuratedSet', setId=set_id, pageSize=15, page=1), {'data': {'CuratedSet': {
+            'type': 'CuratedSet',
+            'setId': set_id,
+            'text': texts('set', 'Set {}'.format(i)),
+            'items': rows,
+            'meta': {'page_size': items, 'offset': 0, 'hits': items},
+        }}})
+
+    add('GET', content_path('StandardCollection/contentClass/contentType/slug/movies'), {'data': {'Collection': {
+        'text': texts('collection', 'Movies'),
+        'image': image('collection-movies'),
+        'containers': containers,
+    }}})
+
+    add('GET', content_path('DmcSeriesBundle/encodedSeriesId/{}'.format(SERIES_ID)), {'data': {'DmcSeriesBundle': {
+        'series': series(1),
+        'seasons': {'seasons': [{
+            'seasonId': 'season-{}'.format(i + 1),
+            'seasonSequenceNumber': i + 1,
+            'text': texts('season', 'Season {}'.format(i + 1), 'Season description. ' * 4),
+            'image': image('season-{}'.format(i + 1)),
+            'releases': [{'releaseYear': 2019 + i}],
+        } for i in range(seasons)]},
+        'extras': {'videos': [video(9000 + i) for i in range(5)]},
+        'related': {'items': [series(9100 + i) for i in range(15)]},
+    }}})
+
+    add('GET', content_path('DmcEpisodes/seasonId/{}/pageSize/30/page/1'.format(SEASON_ID)), {'data': {'DmcEpisodes': {
+        'videos': [video(i, episode=True) for i in range(episodes)],
+        'meta': {'page_size': 30, 'offset': 0, 'hits': episodes},
+    }}})
+
+    add('GET', content_path('DmcVideo/contentId/{}'.format(CONTENT_ID)), {'data': {'DmcVideo': {'video': video(1, episode=True)}}})
+    add('GET', content_path('UpNext/contentId/{}'.format('content-1')), {'data': {'UpNext': {'items': [video(2, episode=True)]}}})
+    for scenario in ('ctr-regular', 'ctr-high'):
+        add('POST', '/media/content-1/scenario/{}'.format(scenario), {
+            'stream': {'sources': [{'complete': {'url': '{server}/stream/content-1/master.m3u8'}}]},
+            'playhead': {'status': 'PlayheadNotFound'},
+            'tracking': {'telemetry': {'mediaId': 'media-1', 'fguid': 'fguid-1'}},
+        })
+
+    page_sets = [explore_set('explore-set-{}'.format(i), [explore_row(i * items + j, movie=bool(j % 2)) for j in range(items)]) for i in range(sets)]
+    add('GET', explore_path('page/{}'.format(PAGE_ID)), {'data': {'page': {
+        'id': PAGE_ID,
+        'type': 'page',
+        'visuals': {'title': 'Explore Page', 'artwork': explore_art('page')},
+        'containers': page_sets,
+        'actions': [],
+    }}})
+
+    for row in page_sets:
+        add('GET', explore_path('set/{}'.format(row['id'])), {'data': {'set': row}})
+
+    add('GET', explore_path('search'), {'data': {'page': {
+        'containers': [explore_set('search', [explore_row(i) for i in range(items)])],
+    }}})
+
+    return fixtures
+
+
+if __name__ == '__main__':
+    import sys
+    json.dump(build(), sys.stdout, indent=1)
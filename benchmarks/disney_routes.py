@@ -0,0 +1,227 @@
+# Runs Disney+ plugin routes headless against a local server replaying API fixtures
+# python benchmarks/disney_routes.py [--fixtures FILE] [--latency MS] [--repeat N] [--warm] [route ...]
+# python benchmarks/disney_routes.py --record FILE [route ...]   (live api, needs a logged in KODI_HOME)
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+os.environ.setdefault('ADDON_ID', 'slyguy.disney.plus')
+
+import env
+
+ADDON_PATH = os.path.join(env.ROOT, 'slyguy.disney.plus')
+sys.path.insert(0, ADDON_PATH)
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+from kodi_six import xbmcplugin
+from slyguy import router, signals, settings, userdata, cache, mem_cache, inputstream, plugin as slyguy_plugin
+from slyguy.session import Session
+from resources.lib import api as disney_api, plugin as addon
+
+import disney_fixtures as fixtures
+from fixture_server import FixtureServer, fixture_key
+
+ROUTES = [
+    ('index', lambda: slyguy_plugin.url_for(addon.index)),
+    ('collection', lambda: slyguy_plugin.url_for(addon.collection, slug='movies', content_class='contentType')),
+    ('sets', lambda: slyguy_plugin.url_for(addon.sets, set_id='set-0', set_type='CuratedSet')),
+    ('series', lambda: slyguy_plugin.url_for(addon.series, series_id=fixtures.SERIES_ID)),
+    ('season', lambda: slyguy_plugin.url_for(addon.season, season_id=fixtures.SEASON_ID, title='Season 1')),
+    ('explore_page', lambda: slyguy_plugin.url_for(addon.explore_page, page_id=fixtures.PAGE_ID)),
+    ('explore_set', lambda: slyguy_plugin.url_for(addon.explore_set, set_id='explore-set-0')),
+    ('search', lambda: slyguy_plugin.url_for(addon.search, query=fixtures.QUERY)),
+    ('play', lambda: slyguy_plugin.url_for(addon.play, content_id=fixtures.CONTENT_ID)),
+]
+
+
+class GetLiTimer(object):
+    def __init__(self):
+        self.seconds = 0
+        self.calls = 0
+        self._get_li = slyguy_plugin.Item.get_li
+
+    def __enter__(self):
+        get_li = self._get_li
+
+        def wrapper(item, *args, **kwargs):
+            start = time.time()
+            try:
+                return get_li(item, *args, **kwargs)
+            finally:
+                self.seconds += time.time() - start
+                self.calls += 1
+
+        slyguy_plugin.Item.get_li = wrapper
+        return self
+
+    def __exit__(self, *args):
+        slyguy_plugin.Item.get_li = self._get_li
+
+
+class Recorder(object):
+    def __init__(self):
+        self.fixtures = {}
+        self.hosts = set()
+        self._request = Session.request
+
+    def __enter__(self):
+        request = self._request
+        recorder = self
+
+        def wrapper(session, method, url, **kwargs):
+            resp = request(session, method, url, **kwargs)
+            body = json.dumps(kwargs['json']) if kwargs.get('json') is not None else kwargs.get('data')
+            recorder.hosts.add(urlparse(url).netloc)
+            recorder.fixtures[fixture_key(method, url, body)] = resp.text
+            return resp
+
+        Session.request = wrapper
+        return self
+
+    def __exit__(self, *args):
+        Session.request = self._request
+
+    def save(self, path):
+        data = {}
+        for key, text in self.fixtures.items():
+            for host in self.hosts:
+                text = text.replace('https://{}'.format(host), '{server}')
+            data[key] = text
+
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+
+def dispatch(url):
+    errors = []
+    signals.add(signals.ON_ERROR, errors.append)
+    signals.add(signals.ON_EXCEPTION, errors.append)
+    sys.argv = [url.split('?')[0], '1', '?' + url.split('?', 1)[1] if '?' in url else '']
+    try:
+        router.dispatch(url)
+    finally:
+        signals._signals[signals.ON_ERROR].remove(errors.append)
+        signals._signals[signals.ON_EXCEPTION].remove(errors.append)
+    return errors
+
+
+def reset_caches():
+    cache.empty()
+    mem_cache.empty()
+
+
+def run_route(server, name, url, repeat):
+    results = []
+    for index in range(repeat):
+        if index == 0:
+            reset_caches()
+
+        server.reset()
+        items = len(xbmcplugin.ITEMS)
+        resolved = len(xbmcplugin.RESOLVED)
+
+        tracemalloc.start()
+        with GetLiTimer() as get_li:
+            start = time.time()
+            errors = dispatch(url)
+            wall = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results.append({
+            'wall': wall,
+            'calls': server.requests,
+            'connections': server.connections,
+            'bytes': server.bytes,
+            'peak': peak,
+            'get_li': get_li.seconds,
+            'items': len(xbmcplugin.ITEMS) - items + len(xbmcplugin.RESOLVED) - resolved,
+            'errors': errors,
+            'misses': list(server.misses),
+        })
+
+    return results
+
+
+def report(name, label, row):
+    print('{:<13} {:<5} {:>8.1f} ms  {:>4.0f} calls  {:>4.0f} conns  {:>8.1f} KB  peak {:>7.1f} MB  get_li {:>7.1f} ms  items {:>4.0f}'.format(
+        name, label, row['wall'] * 1000, row['calls'], row['connections'], row['bytes'] / 1024.0, row['peak'] / 1024.0 / 1024.0, row['get_li'] * 1000, row['items']))
+
+    for error in row['errors']:
+        print('    error: {}: {}'.format(type(error).__name__, error))
+    for key in row['misses']:
+        print('    missing fixture: {}'.format(key))
+
+
+def skip_inputstream():
+    # inputstream adaptive / widevine cdm installs need a real kodi
+    inputstream.Widevine.do_check = lambda self: True
+    inputstream.require_version = lambda *args, **kwargs: True
+
+
+def login():
+    userdata.set('refresh_token', 'refresh-token')
+    userdata.set('profile_id', fixtures.PROFILE_ID)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('routes', nargs='*', help='routes to run (default: all)')
+    parser.add_argument('--fixtures', help='recorded fixture json (default: synthetic fixtures)')
+    parser.add_argument('--record', help='run against the live api and save responses to this file')
+    parser.add_argument('--latency', type=float, default=0, help='added server latency per request in ms')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per route. the first is cold, the rest warm')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    parser.add_argument('--warm', action='store_true', help='enable the warm invoker setting (sessions and mem cache kept between routes)')
+    args = parser.parse_args()
+
+    routes = [x for x in ROUTES if not args.routes or x[0] in args.routes]
+
+    if args.record:
+        with Recorder() as recorder:
+            for name, url in routes:
+                errors = dispatch(url())
+                print('{:<13} {}'.format(name, 'error: {}'.format(errors[0]) if errors else 'ok'))
+        recorder.save(args.record)
+        print('saved {} responses to {}'.format(len(recorder.fixtures), args.record))
+        return
+
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            data = json.load(f)
+    else:
+        data = fixtures.build()
+
+    server = FixtureServer(data, latency=args.latency / 1000.0).start()
+    disney_api.CONFIG_URL = server.url + urlparse(disney_api.CONFIG_URL).path
+    skip_inputstream()
+    login()
+    settings.common_settings.setBool('warm_invoker', args.warm)
+
+    output = {}
+    try:
+        for name, url in routes:
+            results = run_route(server, name, url(), max(args.repeat, 1))
+            output[name] = results
+            if not args.json:
+                report(name, 'cold', results[0])
+                if len(results) > 1:
+                    warm = {key: sum(row[key] for row in results[1:]) / float(len(results) - 1) for key in ('wall', 'calls', 'connections', 'bytes', 'peak', 'get_li', 'items')}
+                    warm.update(errors=[], misses=[])
+                    report(name, 'warm', warm)
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(output, indent=1, default=str))
+
+
+if __name__ == '__main__':
+    main()
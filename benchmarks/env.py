@@ -0,0 +1,28 @@
+# Import this before anything from slyguy.
+# Puts the stub kodi modules and addon module paths on sys.path and points the kodi profile at a temp dir
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stubs')
+
+os.environ.setdefault('KODI_HOME', tempfile.mkdtemp(prefix='slyguy_bench_'))
+os.environ.setdefault('ADDONS_PATH', ROOT)
+os.environ.setdefault('ADDON_ID', 'script.module.slyguy')
+
+for path in (
+    os.path.join(ROOT, 'slyguy.dependencies', 'resources', 'modules'),
+    os.path.join(ROOT, 'script.module.slyguy', 'resources', 'modules'),
+    STUBS,
+):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def timed(func, repeat=1):
+    import time
+    start = time.time()
+    for _ in range(repeat):
+        result = func()
+    return (time.time() - start) / repeat, result
@@ -0,0 +1,107 @@
+# Local http server that replays fixture responses and counts requests / bytes served
+import json
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse
+
+
+def fixture_key(method, url, body=None):
+    key = '{} {}'.format(method.upper(), urlparse(url).path)
+    if body:
+        try:
+            operation = json.loads(body).get('operationName')
+        except (ValueError, AttributeError):
+            operation = None
+        if operation:
+            key += '#' + operation
+    return key
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FixtureServer(object):
+    def __init__(self, fixtures, latency=0):
+        self._fixtures = fixtures
+        self._latency = latency
+        self._lock = threading.Lock()
+        self._server = _Server(('127.0.0.1', 0), self._handler())
+        self.url = 'http://127.0.0.1:{}'.format(self._server.server_port)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes = 0
+            self.misses = []
+
+    def start(self):
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _response(self, method, path, body):
+        key = fixture_key(method, path, body)
+        data = self._fixtures.get(key)
+        if data is None:
+            data = self._fixtures.get(key.split('#')[0])
+
+        if data is None:
+            with self._lock:
+                self.misses.append(key)
+            return 404, b'{}'
+
+        if not isinstance(data, str):
+            data = json.dumps(data)
+
+        return 200, data.replace('{server}', self.url).encode('utf8')
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                BaseHTTPRequestHandler.setup(self)
+                with server._lock:
+                    server.connections += 1
+
+            def _reply(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else None
+                status, data = server._response(self.command, self.path, body)
+
+                if server._latency:
+                    threading.Event().wait(server._latency)
+
+                with server._lock:
+                    server.requests += 1
+                    server.bytes += len(data)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+        return Handler
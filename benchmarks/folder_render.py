@@ -0,0 +1,92 @@
+# Compares per-item vs batched directory rendering for large synthetic folders
+# python benchmarks/folder_render.py [items] [repeat]
+import sys
+
+import env
+
+from kodi_six import xbmcplugin
+from slyguy import plugin, settings
+
+
+def folder(size):
+    folder = plugin.Folder('Benchmark', show_news=False)
+    for i in range(size):
+        folder.add_item(
+            label = 'Episode {}'.format(i),
+            info = {
+                'plot': 'A long description of the episode. ' * 4,
+                'mediatype': 'episode',
+                'tvshowtitle': 'Show',
+                'season': 1,
+                'episode': i + 1,
+                'duration': 1800,
+                'aired': '2020-01-01',
+            },
+            art = {
+                'thumb': 'https://example.com/images/{}/thumb.jpg'.format(i),
+                'fanart': 'https://example.com/images/{}/fanart.jpg'.format(i),
+                'clearlogo': 'https://example.com/images/{}/logo.png'.format(i),
+            },
+            path = plugin.url_for('play', id=i),
+            playable = True,
+        )
+    return folder
+
+
+def per_item(folder):
+    for item in folder.items:
+        li = item.get_li()
+        xbmcplugin.addDirectoryItem(-1, item.path, li, item.is_folder)
+
+
+class Counter(object):
+    def __init__(self, *targets):
+        self.lookups = 0
+        self._targets = targets
+        self._originals = []
+
+    def __enter__(self):
+        for obj, name in self._targets:
+            func = getattr(obj, name)
+            self._originals.append((obj, name, func))
+            setattr(obj, name, self._wrap(func))
+        return self
+
+    def __exit__(self, *args):
+        for obj, name, func in self._originals:
+            setattr(obj, name, func)
+
+    def _wrap(self, func):
+        def wrapper(*args, **kwargs):
+            self.lookups += 1
+            return func(*args, **kwargs)
+        return wrapper
+
+
+def run(name, func, size, repeat):
+    calls = []
+    add_item, add_items = xbmcplugin.addDirectoryItem, xbmcplugin.addDirectoryItems
+    xbmcplugin.addDirectoryItem = lambda *args, **kwargs: calls.append(1) or add_item(*args, **kwargs)
+    xbmcplugin.addDirectoryItems = lambda *args, **kwargs: calls.append(1) or add_items(*args, **kwargs)
+
+    total = 0
+    targets = [(obj, key) for obj in (settings, settings.common_settings) for key in ('get', 'getBool', 'getInt')]
+    try:
+        with Counter(*targets) as counter:
+            for _ in range(repeat):
+                data = folder(size)
+                seconds, _ = env.timed(lambda: func(data))
+                total += seconds
+    finally:
+        xbmcplugin.addDirectoryItem, xbmcplugin.addDirectoryItems = add_item, add_items
+
+    print('{:<8} {:>5} items  {:>8.2f} ms  {:>7.3f} ms/item  settings lookups: {:>6}  kodi calls: {:>5}'.format(
+        name, size, total * 1000 / repeat, total * 1000 / repeat / size, counter.lookups // repeat, len(calls) // repeat))
+
+
+if __name__ == '__main__':
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 500, 2000]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    for size in sizes:
+        run('per-item', per_item, size, repeat)
+        run('batched', lambda data: data.display(), size, repeat)
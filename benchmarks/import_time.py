@@ -0,0 +1,107 @@
+# Import time profile (python -X importtime) of the plugin / proxy entry paths
+# python benchmarks/import_time.py [--save FILE] [--baseline FILE [--tolerance PCT]] [--budget MS] [--repeat N] [--top N]
+# Exits non-zero if an entry loads a module that should only load on first use.
+# Timings depend on the machine, so they are only checked against a baseline saved on the same machine (--save / --baseline)
+# or an explicit --budget
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+import env
+
+# (name, working dir, import statement)
+ENTRIES = [
+    ('router', os.path.join(env.ROOT, 'script.module.slyguy'), 'from slyguy import router'),
+    ('plugin', os.path.join(env.ROOT, 'script.module.slyguy'), 'from slyguy import plugin'),
+    ('proxy', os.path.join(env.ROOT, 'script.module.slyguy'), 'from resources.lib import proxy'),
+    ('disney', os.path.join(env.ROOT, 'slyguy.disney.plus'), 'from resources.lib import plugin'),
+]
+
+# only imported when a resolver rule matches / a subtitle is converted / a dynamic mpd is fixed
+LAZY_MODULES = ['dns', 'pycaption', 'arrow']
+
+
+def profile(cwd, statement):
+    environ = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path[:3]))
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', statement], cwd=cwd, env=environ, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise Exception(stderr.decode('utf8', 'ignore'))
+
+    modules = []
+    for line in stderr.decode('utf8', 'ignore').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0))
+
+    return modules
+
+
+def run(name, cwd, statement, repeat):
+    runs = [profile(cwd, statement) for _ in range(repeat)]
+    totals = [sum(row[1] for row in modules) for modules in runs]
+    return totals.index(min(totals)), runs, totals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('entries', nargs='*', help='entries to check (default: all)')
+    parser.add_argument('--budget', type=float, help='max import time in ms per entry (off by default)')
+    parser.add_argument('--save', help='write entry totals to this json file for use as a --baseline')
+    parser.add_argument('--baseline', help='json file written by --save on this machine')
+    parser.add_argument('--tolerance', type=float, default=20, help='max percent over the --baseline total')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per entry. the fastest is used')
+    parser.add_argument('--top', type=int, default=10, help='slowest top level packages to show')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failed = False
+    results = {}
+    for name, cwd, statement in ENTRIES:
+        if args.entries and name not in args.entries:
+            continue
+
+        best, runs, totals = run(name, cwd, statement, max(args.repeat, 1))
+        modules = runs[best]
+        total = totals[best]
+        results[name] = total
+
+        packages = {}
+        for module, self_ms, _ in modules:
+            package = module.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_ms
+
+        lazy = sorted(set(module.split('.')[0] for module, _, _ in modules if module.split('.')[0] in LAZY_MODULES))
+        limits = []
+        if args.budget:
+            limits.append(('budget {:.0f} ms'.format(args.budget), args.budget))
+        if name in baseline:
+            limits.append(('baseline {:.1f} ms +{:.0f}%'.format(baseline[name], args.tolerance), baseline[name] * (1 + args.tolerance / 100.0)))
+        over = [label for label, limit in limits if total > limit]
+
+        print('{:<8} {:>8.1f} ms  {}'.format(name, total, 'FAIL' if over or lazy else 'ok'))
+        if over:
+            print('    over {}'.format(', '.join(over)))
+        for package in sorted(packages, key=lambda key: packages[key], reverse=True)[:args.top]:
+            print('    {:<24} {:>8.1f} ms'.format(package, packages[package]))
+        if lazy:
+            print('    eagerly imported: {}'.format(', '.join(lazy)))
+
+        failed = failed or over or bool(lazy)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
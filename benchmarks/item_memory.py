@@ -0,0 +1,62 @@
+# Memory and time to build, pickle and render large folders of plugin items
+# python benchmarks/item_memory.py [items ...]
+import gc
+import sys
+import time
+import pickle
+import tracemalloc
+
+import env
+
+from slyguy import plugin
+
+
+def folder(size):
+    folder = plugin.Folder('Benchmark', show_news=False)
+    for i in range(size):
+        folder.add_item(
+            label = 'Episode {}'.format(i),
+            info = {
+                'plot': 'Episode plot',
+                'mediatype': 'episode',
+                'tvshowtitle': 'Show',
+                'season': 1,
+                'episode': i + 1,
+                'duration': 1800,
+                'aired': '2020-01-01',
+            },
+            art = {
+                'thumb': 'https://example.com/images/{}/thumb.jpg'.format(i),
+                'fanart': 'https://example.com/images/{}/fanart.jpg'.format(i),
+            },
+            path = plugin.url_for('play', id=i),
+            playable = True,
+        )
+    return folder
+
+
+def measure(func):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    result = func()
+    seconds = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, current, peak
+
+
+def run(size):
+    data, build, retained, _ = measure(lambda: folder(size))
+    pickled, dump, _, _ = measure(lambda: pickle.dumps(data, 2))
+    _, load, _, _ = measure(lambda: pickle.loads(pickled))
+    _, display, _, peak = measure(data.display)
+
+    print('{:>5} items  build {:>7.1f} ms  retained {:>6.2f} MB  pickle {:>6.1f} KB ({:>5.1f} / {:>5.1f} ms)  display {:>7.1f} ms  peak {:>6.2f} MB'.format(
+        size, build * 1000, retained / 1024.0 / 1024.0, len(pickled) / 1024.0, dump * 1000, load * 1000, display * 1000, peak / 1024.0 / 1024.0))
+
+
+if __name__ == '__main__':
+    sizes = [int(x) for x in sys.argv[1:]] or [1000, 5000]
+    for size in sizes:
+        run(size)
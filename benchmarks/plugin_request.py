@@ -0,0 +1,120 @@
+# Latency of a license request through the proxy when the plugin request is handled in-process vs a plugin invocation
+# python benchmarks/plugin_request.py [requests]
+# The plugin path is run as a fresh python process (interpreter start, imports, dispatch) to stand in for Kodi's plugin invoker
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+ADDON_ID = 'plugin.bench.requests'
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ADDONS_PATH = tempfile.mkdtemp(prefix='slyguy_bench_addons_')
+os.environ['ADDONS_PATH'] = ADDONS_PATH
+
+import env
+
+sys.path.insert(0, os.path.join(env.ROOT, 'script.module.slyguy'))
+
+from kodi_six import xbmc
+from slyguy.session import RawSession
+from slyguy import plugin_requests
+from resources.lib import proxy
+
+from fixture_server import FixtureServer
+
+HANDLERS = '''from slyguy.plugin_requests import handler
+
+@handler('license_request')
+def license_request(license_url, _data=None, _headers=None, **kwargs):
+    return {'url': license_url, 'headers': {'x-license-token': 'token'}}
+'''
+
+DEFAULT = '''from slyguy import plugin
+from resources.lib.plugin_requests import license_request as _license_request
+
+@plugin.route()
+@plugin.plugin_request()
+def license_request(**kwargs):
+    return _license_request(**kwargs)
+
+plugin.dispatch()
+'''
+
+RUNNER = '''import sys
+url = sys.argv[1]
+sys.argv = [url.split('?')[0], '1', '?' + url.split('?', 1)[1]]
+import default
+from kodi_six import xbmcplugin
+print(xbmcplugin.ITEMS[-1])
+'''
+
+
+def make_addon():
+    temp = xbmc.translatePath('special://temp')
+    if not os.path.exists(temp):
+        os.makedirs(temp)
+
+    for name in ('script.module.slyguy', 'slyguy.dependencies'):
+        os.symlink(os.path.join(ROOT, name), os.path.join(ADDONS_PATH, name))
+
+    addon_path = os.path.join(ADDONS_PATH, ADDON_ID)
+    os.makedirs(os.path.join(addon_path, 'resources', 'lib'))
+    files = {
+        'default.py': DEFAULT,
+        os.path.join('resources', '__init__.py'): '',
+        os.path.join('resources', 'lib', '__init__.py'): '',
+        os.path.join('resources', 'lib', 'plugin_requests.py'): HANDLERS,
+    }
+    for name in files:
+        with open(os.path.join(addon_path, name), 'w') as f:
+            f.write(files[name])
+    return addon_path
+
+
+def plugin_invoker(addon_path):
+    environ = dict(os.environ, ADDON_ID=ADDON_ID, PYTHONPATH=os.pathsep.join(sys.path[:4]))
+
+    def run_plugin(url, wait=False):
+        output = subprocess.check_output([sys.executable, '-c', RUNNER, url], cwd=addon_path, env=environ)
+        return [], [output.decode('utf8').strip().splitlines()[-1]]
+    return run_plugin
+
+
+def run(name, url, requests):
+    session = RawSession()
+    times = []
+    for _ in range(requests):
+        start = time.time()
+        resp = session.post(url, data=b'challenge', timeout=30)
+        times.append(time.time() - start)
+        if resp.status_code != 200 or resp.content != b'license':
+            raise Exception('{} failed: {} {}'.format(name, resp.status_code, resp.content[:100]))
+
+    print('{:<12} {:>3} requests  first {:>8.1f} ms  avg {:>8.1f} ms  min {:>8.1f} ms'.format(
+        name, requests, times[0] * 1000, sum(times) * 1000 / len(times), min(times) * 1000))
+
+
+if __name__ == '__main__':
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    addon_path = make_addon()
+    server = FixtureServer({'POST /license': 'license'}).start()
+    proxy.run_plugin = plugin_invoker(addon_path)
+
+    service = proxy.Proxy()
+    service.start()
+    try:
+        url = '{}plugin://{}/?_=license_request&license_url={}/license'.format(proxy.settings.common_settings.get('_proxy_path'), ADDON_ID, server.url)
+        run('in-process', url, requests)
+
+        call = plugin_requests.call
+        plugin_requests.call = lambda *args, **kwargs: None
+        try:
+            run('plugin', url, requests)
+        finally:
+            plugin_requests.call = call
+    finally:
+        service.stop()
+        server.stop()
+        shutil.rmtree(ADDONS_PATH, ignore_errors=True)
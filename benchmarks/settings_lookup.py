@@ -0,0 +1,39 @@
+# Settings lookup cost: linear id scan vs the id index, with and without the resolved value snapshot
+# python benchmarks/settings_lookup.py [lookups]
+import sys
+
+import env
+
+from slyguy import settings
+from slyguy.settings import types
+
+KEYS = ['proxy_enabled', '_proxy_path', 'verify_ssl', 'http_timeout', 'http_retries', 'proxy_server',
+    'persist_cache', 'video_view_menus', 'h265', 'max_bandwidth', 'bookmarks', 'not_a_setting']
+
+
+def linear(key):
+    for setting in types.BaseSettings.SETTINGS.values():
+        if setting.matches_id(key):
+            return setting
+
+
+def run(name, func, lookups):
+    seconds, _ = env.timed(lambda: [func(KEYS[i % len(KEYS)]) for i in range(lookups)])
+    print('{:<22} {:>7} lookups  {:>8.2f} ms  {:>6.2f} us/lookup'.format(name, lookups, seconds * 1000, seconds * 1000000 / lookups))
+
+
+def no_snapshot(key):
+    types.VALUES.clear()
+    return settings.common_settings.get(key)
+
+
+if __name__ == '__main__':
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    common = settings.common_settings
+    common.get('not_a_setting')
+
+    print('{} settings registered'.format(len(types.BaseSettings.SETTINGS)))
+    run('linear get_setting', linear, lookups)
+    run('indexed get_setting', common.get_setting, lookups)
+    run('get (no snapshot)', no_snapshot, lookups)
+    run('get (snapshot)', common.get, lookups)
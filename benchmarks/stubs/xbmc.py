@@ -0,0 +1,97 @@
+# Minimal stand-in for Kodi's xbmc module so the addons can be imported headless
+import os
+import sys
+
+LOGDEBUG, LOGINFO, LOGNOTICE, LOGWARNING, LOGERROR, LOGFATAL, LOGNONE = 0, 1, 1, 2, 3, 4, 5
+PLAYLIST_MUSIC, PLAYLIST_VIDEO = 0, 1
+
+ROOT = os.environ.get('KODI_HOME', '/tmp/kodi')
+BUILTINS = []
+
+
+def log(msg, level=LOGDEBUG):
+    if os.environ.get('KODI_LOG'):
+        sys.stderr.write('{}\n'.format(msg))
+
+
+def translatePath(path):
+    if path.startswith('special://'):
+        return os.path.join(ROOT, path[len('special://'):])
+    return path
+
+
+def getInfoLabel(label):
+    return {'System.BuildVersion': '20.2'}.get(label, '')
+
+
+def getCondVisibility(condition):
+    return False
+
+
+def executebuiltin(function, wait=False):
+    BUILTINS.append(function)
+
+
+def executeJSONRPC(query):
+    return '{"result": {}}'
+
+
+def getLanguage(*args, **kwargs):
+    return 'English'
+
+
+def getRegion(*args, **kwargs):
+    return ''
+
+
+def getLocalizedString(id):
+    return ''
+
+
+def getSkinDir():
+    return 'skin.estuary'
+
+
+def sleep(ms):
+    pass
+
+
+class Monitor(object):
+    def abortRequested(self):
+        return False
+
+    def waitForAbort(self, timeout=0):
+        return False
+
+
+class Player(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def isPlaying(self):
+        return False
+
+
+class PlayList(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class Keyboard(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class _Detail(object):
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+Actor = VideoStreamDetail = AudioStreamDetail = SubtitleStreamDetail = _Detail
+
+
+class InfoTagVideo(object):
+    pass
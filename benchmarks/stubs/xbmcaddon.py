@@ -0,0 +1,31 @@
+import os
+
+ADDONS_PATH = os.environ.get('ADDONS_PATH', os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+
+class Addon(object):
+    def __init__(self, id=''):
+        self._id = id or os.environ.get('ADDON_ID', 'script.module.slyguy')
+
+    def getAddonInfo(self, key):
+        return {
+            'id': self._id,
+            'version': '1.0.0',
+            'name': self._id,
+            'path': os.path.join(ADDONS_PATH, self._id),
+            'profile': 'special://profile/addon_data/{}/'.format(self._id),
+            'icon': '',
+            'fanart': '',
+        }.get(key, '')
+
+    def getSetting(self, key):
+        return ''
+
+    def setSetting(self, key, value):
+        pass
+
+    def getLocalizedString(self, id):
+        return ''
+
+    def openSettings(self):
+        pass
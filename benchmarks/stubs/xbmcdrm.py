@@ -0,0 +1 @@
+# xbmcdrm is only imported, never used headless
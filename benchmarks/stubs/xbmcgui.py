@@ -0,0 +1,70 @@
+INPUT_ALPHANUM = 0
+ALPHANUM_HIDE_INPUT = 2
+NOTIFICATION_INFO = 'info'
+
+_PROPERTIES = {}
+
+
+class Window(object):
+    def __init__(self, id=0):
+        pass
+
+    def getProperty(self, key):
+        return _PROPERTIES.get(key, '')
+
+    def setProperty(self, key, value):
+        _PROPERTIES[key] = value
+
+    def clearProperty(self, key):
+        _PROPERTIES.pop(key, None)
+
+
+def getCurrentWindowId():
+    return 10025
+
+
+def getCurrentWindowDialogId():
+    return 9999
+
+
+class _InfoTag(object):
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class ListItem(object):
+    def __init__(self, label='', label2='', path='', offscreen=False):
+        self._properties = {}
+
+    def setProperty(self, key, value):
+        self._properties[key] = value
+
+    def getProperty(self, key):
+        return self._properties.get(key, '')
+
+    def getVideoInfoTag(self):
+        return _InfoTag()
+
+    def getMusicInfoTag(self):
+        return _InfoTag()
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class Dialog(object):
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class DialogProgress(Dialog):
+    pass
+
+
+class DialogProgressBG(Dialog):
+    pass
+
+
+class WindowXMLDialog(object):
+    def __init__(self, *args, **kwargs):
+        pass
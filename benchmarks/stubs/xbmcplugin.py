@@ -0,0 +1,40 @@
+SORT_METHOD_UNSORTED = 0
+SORT_METHOD_LABEL = 1
+SORT_METHOD_DATE = 2
+SORT_METHOD_VIDEO_YEAR = 3
+SORT_METHOD_EPISODE = 4
+SORT_METHOD_DATEADDED = 5
+SORT_METHOD_PLAYCOUNT = 6
+
+ITEMS = []
+RESOLVED = []
+
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    ITEMS.append(url)
+    return True
+
+
+def addDirectoryItems(handle, items, totalItems=0):
+    ITEMS.extend(item[0] for item in items)
+    return True
+
+
+def setResolvedUrl(handle, succeeded, listitem):
+    RESOLVED.append(listitem)
+
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    pass
+
+
+def setContent(handle, content):
+    pass
+
+
+def addSortMethod(handle, sortMethod, label2Mask=''):
+    pass
+
+
+def setPluginCategory(handle, category):
+    pass
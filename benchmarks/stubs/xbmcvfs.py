@@ -0,0 +1,30 @@
+import os
+import shutil
+
+from xbmc import translatePath
+
+
+def exists(path):
+    return os.path.exists(translatePath(path))
+
+
+def mkdirs(path):
+    try:
+        os.makedirs(translatePath(path))
+    except OSError:
+        pass
+    return True
+
+
+def listdir(path):
+    return [], []
+
+
+def delete(path):
+    os.remove(translatePath(path))
+    return True
+
+
+def copy(source, destination):
+    shutil.copy(translatePath(source), translatePath(destination))
+    return True
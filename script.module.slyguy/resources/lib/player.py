@@ -2,9 +2,11 @@ import json
 import time
 
 from kodi_six import xbmc
-from threading import Thread
+from threading import Thread, Timer
 
-from slyguy.util import get_kodi_string, set_kodi_string
+from slyguy.util import get_kodi_string, set_kodi_string, run_plugin
+from slyguy.constants import PREFETCH_DELAY, ROUTE_SNAPSHOT_STOP_DELAY
+from .util import refresh_snapshots
 from slyguy.router import add_url_args
 from slyguy.monitor import monitor
 
@@ -57,6 +59,18 @@ class Player(xbmc.Player):
             callback = add_url_args(self._callback['callback'], _time=play_time)
             xbmc.executebuiltin('RunPlugin({})'.format(callback))
 
+    def onPlayBackStopped(self):
+        timer = Timer(ROUTE_SNAPSHOT_STOP_DELAY, refresh_snapshots, kwargs={'force': True})
+        timer.daemon = True
+        timer.start()
+
+    def onPlayBackEnded(self):
+        self.onPlayBackStopped()
+
+    def _prefetch(self, playing_file, path):
+        if self.isPlaying() and self.getPlayingFile() == playing_file:
+            run_plugin(path)
+
     def onAVStarted(self):
         try:
             play_data = json.loads(get_kodi_string('_slyguy_play_data'))
@@ -83,6 +97,11 @@ class Player(xbmc.Player):
             self._playlist.remove(play_data['next']['next_file'])
             self._playlist.add(play_data['next']['next_file'], index=self._playlist.getposition()+1)
 
+        if play_data['next'].get('prefetch_file'):
+            timer = Timer(PREFETCH_DELAY, self._prefetch, [self._playing_file, play_data['next']['prefetch_file']])
+            timer.daemon = True
+            timer.start()
+
         for skip in play_skips:
             if not skip.get('to'):
                 skip['to'] = int(self.getTotalTime())+1
@@ -3,7 +3,7 @@ import re
 from kodi_six import xbmc, xbmcaddon
 from six.moves.urllib_parse import urlparse
 
-from slyguy import plugin, gui, _
+from slyguy import plugin, gui, stats, _
 from slyguy.settings.types import STORAGE
 from slyguy.util import get_kodi_setting, get_addon
 from slyguy.constants import ROUTE_CONTEXT, ROUTE_SETTINGS, ADDON_NAME
@@ -118,3 +118,94 @@ def check_log(**kwargs):
         if gui.yes_no(_.UPLOAD_LOG):
             addon = get_addon('script.kodi.loguploader', required=True, install=True)
             xbmc.executebuiltin('RunScript(script.kodi.loguploader)')
+
+
+@plugin.route()
+def cache_stats(addon_id=None, **kwargs):
+    if not addon_id:
+        folder = plugin.Folder(_.VIEW_CACHE_STATS, cacheToDisc=False)
+
+        for addon_id in stats.get_addon_ids():
+            try:
+                addon = xbmcaddon.Addon(addon_id)
+            except:
+                continue
+
+            folder.add_item(
+                label = addon.getAddonInfo('name'),
+                art = {'thumb': addon.getAddonInfo('icon')},
+                path = plugin.url_for(cache_stats, addon_id=addon_id),
+                context = [(_.RESET_CACHE_STATS, 'RunPlugin({})'.format(plugin.url_for(reset_cache_stats, addon_id=addon_id)))],
+                bookmark = False,
+            )
+
+        if folder.items:
+            folder.add_item(
+                label = _.RESET_CACHE_STATS,
+                path = plugin.url_for(reset_cache_stats),
+                is_folder = False,
+                bookmark = False,
+            )
+
+        return folder
+
+    folder = plugin.Folder(addon_id, cacheToDisc=False)
+    for row in stats.get_rows(addon_id):
+        func = _.ALL_FUNCTIONS if row.func == stats.ALL_FUNCS else row.func
+        folder.add_item(
+            label = _(_.CACHE_STATS_LABEL, func=func, cache=row.cache, ratio=row.hit_ratio*100, lookups=row.lookups),
+            info = {'plot': _(_.CACHE_STATS_PLOT, hits=row.hits, misses=row.misses, stale=row.stale, evictions=row.evictions,
+                fetch_ms=row.avg_fetch_ms, payload_kb=row.avg_payload_kb)},
+            is_folder = False,
+            bookmark = False,
+        )
+
+    return folder
+
+@plugin.route()
+def reset_cache_stats(addon_id=None, **kwargs):
+    stats.reset(addon_id)
+    gui.refresh()
+
+@plugin.route()
+def playback_trace(session_id=None, **kwargs):
+    if not session_id:
+        folder = plugin.Folder(_.VIEW_PLAYBACK_TRACE, cacheToDisc=False)
+
+        for row in stats.get_traces():
+            try:
+                addon = xbmcaddon.Addon(row.addon_id)
+            except:
+                continue
+
+            folder.add_item(
+                label = _(_.PLAYBACK_TRACE_LABEL, addon=addon.getAddonInfo('name'), total=row.total*1000),
+                art = {'thumb': addon.getAddonInfo('icon')},
+                path = plugin.url_for(playback_trace, session_id=row.session_id),
+                bookmark = False,
+            )
+
+        if folder.items:
+            folder.add_item(
+                label = _.RESET_PLAYBACK_TRACE,
+                path = plugin.url_for(reset_playback_trace),
+                is_folder = False,
+                bookmark = False,
+            )
+
+        return folder
+
+    folder = plugin.Folder(session_id, cacheToDisc=False)
+    for row in stats.get_trace_rows(session_id):
+        folder.add_item(
+            label = _(_.PLAYBACK_TRACE_STAGE, start=row.start*1000, stage=row.stage, duration=row.duration*1000),
+            is_folder = False,
+            bookmark = False,
+        )
+
+    return folder
+
+@plugin.route()
+def reset_playback_trace(**kwargs):
+    stats.reset_traces()
+    gui.refresh()
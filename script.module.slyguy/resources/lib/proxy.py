@@ -3,13 +3,13 @@ import os
 import re
 import time
 import json
+import zlib
 import shutil
 import binascii
 
 from xml.dom.minidom import parseString
 from functools import cmp_to_key
 
-import arrow
 from requests import ConnectionError
 
 try:
@@ -26,9 +26,8 @@ except ImportError:
     from six.moves.urllib.parse import urlparse, urljoin, unquote_plus, parse_qsl
 
 from kodi_six import xbmc
-from pycaption import detect_format, WebVTTWriter
 
-from slyguy import gui, settings, log, _
+from slyguy import gui, settings, stats, plugin_requests, log, _
 from slyguy.constants import *
 from slyguy.util import check_port, remove_file, get_kodi_string, set_kodi_string, fix_url, run_plugin, lang_allowed, fix_language, pthms_to_seconds
 from slyguy.exceptions import Exit
@@ -61,9 +60,11 @@ ATTRIBUTELISTPATTERN = re.compile(r'''((?:[^,"']|"[^"]*"|'[^']*')+)''')
 DEFAULT_KID_PATTERN = re.compile(':default_KID="([0-9a-fA-F]{32})"')
 
 DEFAULT_SESSION_NAME = 'playback'
+MAX_SESSION_TOKENS = 5
 PROXY_GLOBAL = {
     'last_qualities': [],
     'sessions': {},
+    'session_tokens': [],
     'error_count': 0,
 }
 
@@ -74,6 +75,8 @@ def middleware_regex(response, pattern, **kwargs):
         response.stream.content = match.group(1).encode('utf8')
 
 def middleware_convert_sub(response, **kwargs):
+    from pycaption import detect_format, WebVTTWriter
+
     data = response.stream.content.decode('utf8')
     reader = detect_format(data)
     if reader:
@@ -89,15 +92,18 @@ def middleware_convert_sub(response, **kwargs):
 def middleware_plugin(response, url, **kwargs):
     path = 'special://temp/proxy.middleware'
     real_path = xbmc.translatePath(path)
-    with open(real_path, 'wb') as f:
-        f.write(response.stream.content)
 
-    if ADDON_DEV:
-        shutil.copy(real_path, real_path+'.in')
+    data = plugin_requests.call(url, _data=response.stream.content, _path=real_path)
+    if data is None:
+        with open(real_path, 'wb') as f:
+            f.write(response.stream.content)
 
-    url = add_url_args(url, _path=path)
-    dirs, files = run_plugin(url, wait=True)
-    data = json.loads(unquote_plus(files[0]))
+        if ADDON_DEV:
+            shutil.copy(real_path, real_path+'.in')
+
+        url = add_url_args(url, _path=path)
+        dirs, files = run_plugin(url, wait=True)
+        data = json.loads(unquote_plus(files[0]))
 
     if not os.path.exists(real_path):
         raise Exception('No data returned from plugin')
@@ -148,6 +154,11 @@ class RequestHandler(BaseHTTPRequestHandler):
 
         self.proxy_path = 'http://{}/'.format(self.headers.get('Host'))
 
+        token = None
+        if url.startswith(SESSION_URL+'/'):
+            token, _, url = url[len(SESSION_URL)+1:].partition('/')
+            self.proxy_path += SESSION_PATH.format(token)
+
         self._headers = {}
         for header in self.headers:
             key = header.lower()
@@ -173,6 +184,11 @@ class RequestHandler(BaseHTTPRequestHandler):
                     'proxy_server': settings.get('proxy_server'),
                 }
                 log.debug('Session created from header addon_id: {}'.format(session_addonid))
+        elif token in PROXY_GLOBAL['sessions']:
+            session_type = DEFAULT_SESSION_NAME
+            self._session = PROXY_GLOBAL['sessions'][token]
+            if 'trace_handoff' in self._session:
+                self._trace('proxy_data', self._session.pop('trace_handoff'))
         else:
             session_type = DEFAULT_SESSION_NAME
             self._session = PROXY_GLOBAL['sessions'].get(session_type) or {}
@@ -186,6 +202,8 @@ class RequestHandler(BaseHTTPRequestHandler):
                 if not self._session:
                     log.debug('Session created from proxy data')
                     self._session.update(proxy_data)
+                    if 'trace_handoff' in self._session:
+                        self._trace('proxy_data', self._session.pop('trace_handoff'))
             except:
                 pass
         PROXY_GLOBAL['sessions'][session_type] = self._session
@@ -200,6 +218,20 @@ class RequestHandler(BaseHTTPRequestHandler):
 
         return url
 
+    def _trace(self, stage, start):
+        trace = self._session.get('trace')
+        if trace is None or stage in [row[0] for row in trace]:
+            return
+
+        trace.append([stage, start, time.time() - start])
+        if 'first_segment' not in [row[0] for row in trace]:
+            return
+
+        try:
+            stats.save_trace(self._session['session_id'], self._session.get('addon_id'), trace)
+        except Exception as e:
+            log.debug('Failed to save playback trace: {}'.format(e))
+
     def _update_urls(self, url, new_url):
         if url == new_url:
             return new_url
@@ -216,21 +248,24 @@ class RequestHandler(BaseHTTPRequestHandler):
     def _plugin_request(self, url):
         log.debug('PLUGIN REQUEST: {}'.format(url))
 
-        if self._post_data:
-            path = 'special://temp/proxy.plugin_request'
-            real_path = xbmc.translatePath(path)
-            with open(real_path, 'wb') as f:
-                f.write(self._post_data)
+        data = plugin_requests.call(url, _data=self._post_data, _headers=self._headers.copy())
+        if data is None:
+            if self._post_data:
+                path = 'special://temp/proxy.plugin_request'
+                real_path = xbmc.translatePath(path)
+                with open(real_path, 'wb') as f:
+                    f.write(self._post_data)
 
-            if ADDON_DEV:
-                shutil.copy(real_path, real_path+'.in')
+                if ADDON_DEV:
+                    shutil.copy(real_path, real_path+'.in')
 
-            url = add_url_args(url, _path=path)
+                url = add_url_args(url, _path=path)
 
-        url = add_url_args(url, _headers=json.dumps(self._headers))
+            url = add_url_args(url, _headers=json.dumps(self._headers))
+
+            dirs, files = run_plugin(url, wait=True)
+            data = json.loads(unquote_plus(files[0]))
 
-        dirs, files = run_plugin(url, wait=True)
-        data = json.loads(unquote_plus(files[0]))
         for key in data.get('headers', {}):
             self._headers[key.lower()] = data['headers'][key]
 
@@ -286,8 +321,15 @@ class RequestHandler(BaseHTTPRequestHandler):
             return
 
         try:
+            start = time.time()
             response = self._proxy_request('GET', url)
 
+            parse = urlparse(self.path.lower())
+            if url == manifest:
+                self._trace('manifest_fetch', start)
+            elif not parse.path.endswith(('.m3u', '.m3u8', '.mpd')) and response.headers.get('content-type') not in ('application/x-mpegURL', 'application/dash+xml'):
+                self._trace('first_segment', start)
+
             if not self._session.get('type') and url == manifest:
                 if response.headers.get('content-type') == 'application/x-mpegURL':
                     self._session['type'] = 'm3u8'
@@ -298,12 +340,15 @@ class RequestHandler(BaseHTTPRequestHandler):
                 self._output_response(response)
                 return
 
-            parse = urlparse(self.path.lower())
+            start = time.time()
             if self._session.get('type') == 'm3u8' and (url == manifest or parse.path.endswith('.m3u') or parse.path.endswith('.m3u8') or response.headers.get('content-type') == 'application/x-mpegURL'):
                 self._parse_m3u8(response)
 
             elif self._session.get('type') == 'mpd' and url == manifest:
                 self._parse_dash(response)
+
+            if url == manifest:
+                self._trace('manifest_parse', start)
         except Exception as e:
             log.exception(e)
 
@@ -533,6 +578,7 @@ class RequestHandler(BaseHTTPRequestHandler):
 
             ## Fix mpd overalseconds bug issue: https://github.com/xbmc/inputstream.adaptive/issues/731 / https://github.com/xbmc/inputstream.adaptive/pull/881     
             if 'timeShiftBufferDepth' not in mpd_attribs and 'mediaPresentationDuration' not in mpd_attribs:
+                import arrow
                 buffer_seconds = (arrow.now() - arrow.get(mpd.getAttribute('availabilityStartTime'))).total_seconds()
                 mpd.setAttribute('mediaPresentationDuration', 'PT{}S'.format(buffer_seconds))
                 log.debug('Dash Fix: {}S mediaPresentationDuration added'.format(buffer_seconds))
@@ -1426,14 +1472,38 @@ class RequestHandler(BaseHTTPRequestHandler):
         response = self._proxy_request('HEAD', url)
         self._output_response(response)
 
+    def _register_session(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            data = json.loads(zlib.decompress(self.rfile.read(length)).decode('utf8'))
+            token = register_session(data).encode('utf8')
+        except Exception as e:
+            log.debug('Failed to register session: {}'.format(e))
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(token)))
+        self.end_headers()
+        self.wfile.write(token)
+
     def do_POST(self):
+        if self.path.lstrip('/') == SESSION_URL:
+            self._register_session()
+            return
+
         url = self._get_url('POST')
 
+        start = time.time()
         for i in range(3):
             response = self._proxy_request('POST', url)
             if url != self._session.get('license_url'):
                 break
 
+            self._trace('license', start)
+
             license_data = response.stream.content
             if ADDON_DEV:
                 with open(xbmc.translatePath('special://temp/license.data'), 'wb') as f:
@@ -1509,6 +1579,19 @@ class ResponseStream(object):
 
                 yield chunk
 
+def register_session(data):
+    token = data['session_id']
+    tokens = PROXY_GLOBAL['session_tokens']
+    if token not in tokens:
+        tokens.append(token)
+
+    while len(tokens) > MAX_SESSION_TOKENS:
+        PROXY_GLOBAL['sessions'].pop(tokens.pop(0), None)
+
+    PROXY_GLOBAL['sessions'][token] = data
+    log.debug('Session registered: {}'.format(token))
+    return token
+
 def save_session():
     # persist session across service restarts
     session = PROXY_GLOBAL['sessions'].get(DEFAULT_SESSION_NAME)
@@ -1,17 +1,22 @@
+import os
 import sys
 import uuid
 from time import time
 
-from slyguy import gui, settings, log, check_donor, is_donor, set_drm_level, _
+from kodi_six import xbmc
+
+from slyguy import gui, settings, database, log, check_donor, is_donor, set_drm_level, _
 from slyguy.session import Session
 from slyguy.monitor import monitor
 from slyguy.util import get_system_arch
 from slyguy.settings import set_trailer_context
+from slyguy.settings.types import STORAGE
 from slyguy.settings.db_storage import db
+from slyguy.constants import DB_MAINTENANCE_INTERVAL
 
 from .proxy import Proxy
 from .player import Player
-from .util import check_updates, check_repo
+from .util import check_updates, check_repo, refresh_snapshots
 from .constants import *
 
 
@@ -36,6 +41,24 @@ def _check_news():
     settings.common_settings.setDict('_news', news)
 
 
+def _check_db_maintenance():
+    _time = int(time())
+    if _time < settings.common_settings.getInt('_last_db_maintenance', 0) + DB_MAINTENANCE_INTERVAL:
+        return
+
+    settings.common_settings.setInt('_last_db_maintenance', _time)
+
+    database.maintenance(db)
+    for addon_id in STORAGE.get_addon_ids():
+        db_path = xbmc.translatePath('special://profile/addon_data/{}/data.db'.format(addon_id))
+        if not os.path.exists(db_path):
+            continue
+
+        addon_db = database.init(db_path=db_path)
+        database.maintenance(addon_db)
+        database.close(addon_db)
+
+
 def check_arch():
     arch = get_system_arch()[1]
     mac = int(uuid.getnode())
@@ -74,7 +97,7 @@ def start():
     try:
         while not monitor.abortRequested():
             try:
-                settings.common_settings.reset()
+                settings.common_settings.check_changed()
                 check_donor()
 
                 if is_donor() and settings.common_settings.getBool('fast_updates'):
@@ -84,6 +107,8 @@ def start():
                     _check_news()
 
                 check_repo()
+                _check_db_maintenance()
+                refresh_snapshots()
             except Exception as e:
                 log.debug('Service loop failed: {}'.format(e))
 
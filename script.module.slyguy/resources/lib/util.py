@@ -5,8 +5,9 @@ from kodi_six import xbmc
 
 from slyguy import settings, log, _
 from slyguy.session import Session
-from slyguy.util import kodi_rpc, get_addon, safe_copy
-from slyguy.constants import UPDATE_TIME_LIMIT, REPO_ADDON_ID, REPO_DOMAIN
+from slyguy.router import add_url_args
+from slyguy.util import kodi_rpc, get_addon, safe_copy, run_plugin
+from slyguy.constants import UPDATE_TIME_LIMIT, REPO_ADDON_ID, REPO_DOMAIN, ROUTE_REFRESH_TAG, ROUTE_SNAPSHOT_INTERVAL, ROUTE_SNAPSHOT_EXPIRY
 
 from .constants import *
 
@@ -23,6 +24,30 @@ def get_slyguy_addons():
         return session.gz_json(ADDONS_URL)
 
 
+def refresh_snapshots(force=False):
+    if not settings.common_settings.getBool('widget_snapshots', False):
+        return
+
+    # refreshing widgets competes with playback for network. player stop refreshes afterwards
+    if xbmc.Player().isPlaying():
+        return
+
+    _time = int(time())
+    if not force and _time < settings.common_settings.getInt('_last_snapshot_refresh', 0) + ROUTE_SNAPSHOT_INTERVAL:
+        return
+
+    settings.common_settings.setInt('_last_snapshot_refresh', _time)
+
+    paths = settings.common_settings.getDict('_snapshot_paths', {})
+    keep = {url: paths[url] for url in paths if _time - paths[url] < ROUTE_SNAPSHOT_EXPIRY}
+    if len(keep) != len(paths):
+        settings.common_settings.setDict('_snapshot_paths', keep)
+
+    for url in keep:
+        log.debug('Refreshing snapshot: {}'.format(url))
+        run_plugin(add_url_args(url, **{ROUTE_REFRESH_TAG: 1}))
+
+
 def check_updates(force=False):
     _time = int(time())
     if not force and _time < settings.common_settings.getInt('_last_updates_check', 0) + UPDATES_CHECK_TIME:
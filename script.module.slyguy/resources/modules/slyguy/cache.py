@@ -1,20 +1,29 @@
+import threading
 from time import time
 from functools import wraps
 
 import peewee
 
-from slyguy import database, settings, signals, gui, router, log, _
-from slyguy.constants import CACHE_TABLENAME, CACHE_EXPIRY, CACHE_CHECKSUM, ROUTE_CLEAR_CACHE
-from slyguy.util import hash_6
+from slyguy import database, settings, signals, gui, router, stats, log, _
+from slyguy.constants import CACHE_TABLENAME, CACHE_EXPIRY, CACHE_CHECKSUM, CACHE_CLEAN_INTERVAL, CACHE_CLEAN_KEY, ROUTE_CLEAR_CACHE, DB_MAX_INSERTS
+from slyguy.util import hash_6, chunked
 
 funcs = []
 
+GET_SQL = 'SELECT value, expires FROM "{0}" WHERE key = ?'.format(CACHE_TABLENAME)
+GET_MANY_SQL = 'SELECT key, value FROM "{0}" WHERE key IN ({{}}) AND expires > ?'.format(CACHE_TABLENAME)
+SET_SQL = 'REPLACE INTO "{0}" (key, value, expires) VALUES (?, ?, ?)'.format(CACHE_TABLENAME)
+
+_pending = {}
+_lock = threading.Lock()
+_buffer = [False]
+
 class Cache(database.Model):
     checksum = CACHE_CHECKSUM
 
     key     = database.HashField(unique=True)
-    value   = database.PickleField()
-    expires = peewee.IntegerField()
+    value   = database.CompressedPickleField()
+    expires = peewee.IntegerField(index=True)
 
     class Meta:
         table_name = CACHE_TABLENAME
@@ -64,16 +73,25 @@ def cached(*args, **kwargs):
             if callable(_key):
                 _key = _key(*args, **kwargs)
 
+            counts = {}
             if not kwargs.pop('_skip_cache', False):
-                value = get(_key)
+                value, stale = _lookup(_key)
                 if value != None:
                     log('Cache Hit: {}'.format(_key))
+                    stats.record('cache', f.__name__, hits=1)
                     return value
 
+                counts['misses'] = 1
+                if stale:
+                    counts['stale'] = 1
+
+            start = time()
             value = f(*args, **kwargs)
+            counts.update(fetches=1, fetch_time=time() - start)
             if value != None:
-                set(_key, value, expires)
+                counts['payload_bytes'] = set(_key, value, expires)
 
+            stats.record('cache', f.__name__, **counts)
             return value
 
         funcs.append(f.__name__)
@@ -81,30 +99,136 @@ def cached(*args, **kwargs):
 
     return lambda f: decorator(f, *args, **kwargs)
 
+def _db():
+    return Cache._meta.database
+
 def get(key, default=None):
     if not enabled():
         return default
 
-    try:
-        return Cache.get(Cache.key == key, Cache.expires > time()).value
-    except Cache.DoesNotExist:
-        return default
+    value = _lookup(key)[0]
+    return default if value is None else value
 
-def set(key, value, expires=CACHE_EXPIRY):
+# returns (value, stale). stale is an entry that exists but has expired
+def _lookup(key):
+    key = Cache.key.db_value(key)
+    row = _pending.get(key)
+    if row is None:
+        row = _db().execute_sql(GET_SQL, (key,)).fetchone()
+        if row is None:
+            return None, False
+    else:
+        row = row[1:]
+
+    if row[1] <= int(time()):
+        return None, True
+
+    return Cache.value.python_value(row[0]), False
+
+def get_many(keys, default=None):
+    values = {}
+    if not enabled():
+        return {key: default for key in keys}
+
+    now = int(time())
+    lookup = {}
+    for key in keys:
+        db_key = Cache.key.db_value(key)
+        if db_key in _pending:
+            row = _pending[db_key]
+            if row[2] > now:
+                values[key] = Cache.value.python_value(row[1])
+        else:
+            lookup[db_key] = key
+
+    for chunk in chunked(list(lookup.keys()), 998):
+        cursor = _db().execute_sql(GET_MANY_SQL.format(', '.join('?'*len(chunk))), chunk + [now])
+        for row in cursor.fetchall():
+            values[lookup[row[0]]] = Cache.value.python_value(row[1])
+
+    for key in keys:
+        values.setdefault(key, default)
+
+    return values
+
+def set(key, value, expires=CACHE_EXPIRY, immediate=False):
+    return set_many({key: value}, expires, immediate=immediate)
+
+# immediate writes straight through for keys other processes need to see now
+def set_many(items, expires=CACHE_EXPIRY, immediate=False):
     expires = int(time() + expires)
-    Cache.set(key=key, value=value, expires=expires)
+    rows = [(Cache.key.db_value(key), Cache.value.db_value(value), expires) for key, value in items.items()]
+
+    if immediate or not _buffer[0]:
+        with _lock:
+            for row in rows:
+                _pending.pop(row[0], None)
+        _write(rows)
+    else:
+        with _lock:
+            for row in rows:
+                _pending[row[0]] = row
+
+        if len(_pending) >= DB_MAX_INSERTS:
+            flush()
+
+    return sum(len(row[1]) for row in rows)
+
+def _write(rows):
+    if not rows:
+        return
+
+    db = _db()
+    try:
+        with db.atomic():
+            db.cursor().executemany(SET_SQL, rows)
+    except Exception as e:
+        # fallback to individual writes so one bad row doesnt lose the batch
+        log.debug('Cache: Batch write of {} rows failed ({}). Falling back to single writes'.format(len(rows), e))
+        for row in rows:
+            try:
+                db.execute_sql(SET_SQL, row)
+            except Exception as e:
+                log.debug('Cache: Failed to write row: {}'.format(e))
+
+@signals.on(signals.BEFORE_DISPATCH)
+def _start_buffer():
+    _buffer[0] = True
+
+@signals.on(signals.AFTER_DISPATCH)
+def flush():
+    with _lock:
+        rows = list(_pending.values())
+        _pending.clear()
+
+    if rows:
+        start = time()
+        _write(rows)
+        log('Cache: Flushed {} Rows in {:.3f}s'.format(len(rows), time() - start))
 
 def delete(key):
+    with _lock:
+        _pending.pop(Cache.key.db_value(key), None)
     return Cache.delete_where(Cache.key == key)
 
 def empty():
+    with _lock:
+        _pending.clear()
     deleted = Cache.truncate()
     log('Cache: Deleted {} Rows'.format(deleted))
 
-@signals.on(signals.BEFORE_DISPATCH)
-def remove_expired():
-    deleted = Cache.delete_where(Cache.expires < int(time()))
-    log('Cache: Deleted {} Expired Rows'.format(deleted))
+@signals.on(signals.AFTER_DISPATCH)
+def remove_expired(force=False):
+    now = int(time())
+    if not force and Cache.exists_or_false(Cache.key == CACHE_CLEAN_KEY, Cache.expires > now):
+        return
+
+    start = time()
+    deleted = Cache.delete_where(Cache.expires < now)
+    if deleted:
+        stats.record('cache', stats.ALL_FUNCS, evictions=deleted)
+    Cache.set(key=CACHE_CLEAN_KEY, value=now, expires=now + CACHE_CLEAN_INTERVAL)
+    log('Cache: Deleted {} Expired Rows ({} Remaining) in {:.3f}s'.format(deleted, Cache.select().count(), time() - start))
 
 @router.route(ROUTE_CLEAR_CACHE)
 def clear_cache(key, **kwargs):
@@ -113,4 +237,6 @@ def clear_cache(key, **kwargs):
     gui.notification(msg)
 
 
+signals.add(signals.ON_CLOSE, flush)
+signals.add(signals.ON_EXIT, flush)
 database.init([Cache])
@@ -38,13 +38,17 @@ REQUIRED_UPDATE = [ADDON_ID, COMMON_ADDON_ID, DEPENDENCIES_ADDON_ID, REPO_ADDON_
 DB_PATH         = os.path.join(ADDON_PROFILE, 'data.db')
 DB_MAX_INSERTS  = 100
 DB_PRAGMAS      = {
+    'auto_vacuum': 2, # incremental. must be set before journal_mode
     'journal_mode': 'wal',
     'cache_size': -1 * 10000,  #10MB
     'foreign_keys': 1,
     'ignore_check_constraints': 0,
-    'synchronous': 1
+    'synchronous': 1,
 }
 DB_TABLENAME = '_db'
+DB_MAINTENANCE_INTERVAL = (60*60*24) # 24 Hours
+DB_VACUUM_RATIO = 0.25 # freelist pages / total pages
+DB_COMPRESS_THRESHOLD = 1024 # bytes
 ###################
 
 ##### USERDATA ####
@@ -57,6 +61,14 @@ CACHE_CHECKSUM       = ADDON_VERSION # Recreates cache when new addon version
 CACHE_EXPIRY         = (60*60*24) # 24 Hours
 CACHE_CLEAN_INTERVAL = (60*60*4)  # 4 Hours
 CACHE_CLEAN_KEY      = '_cache_cleaned'
+HTTP_CACHE_STALE     = (60*60*24) # 24 Hours. How long responses with validators are kept for revalidation
+ROUTE_CACHE_GEN_KEY  = '_route_cache_gen'
+ROUTE_CACHE_GEN_EXPIRY = (60*60*24*30) # 30 Days
+ROUTE_SNAPSHOT_EXPIRY = (60*60*24*7) # 7 Days. Stale snapshots are still served while they refresh
+ROUTE_SNAPSHOT_RETRY  = 60 # Seconds before a stale snapshot triggers another refresh
+ROUTE_SNAPSHOT_TOUCH  = (60*60*24) # How often a snapshot path's last used time is updated
+ROUTE_SNAPSHOT_INTERVAL = (60*15) # How often the service refreshes snapshots
+ROUTE_SNAPSHOT_STOP_DELAY = 10 # Seconds after playback stops before snapshots are refreshed
 #################
 
 IPTV_MERGE_ID        = 'plugin.program.iptv.merge'
@@ -85,6 +97,9 @@ ROUTE_AUTOFOLDER_TAG   = '_autofolder'
 ROUTE_MIGRATE_DONE     = '_migrated'
 ROUTE_BOOKMARKS        = '_bookmarks'
 ROUTE_CONTEXT          = '_context'
+PREFETCH_TAG           = '_prefetch'
+ROUTE_REFRESH_TAG      = '_refresh'
+PREFETCH_DELAY         = 15 # Seconds after playback starts before the next item is prefetched
 #################
 
 #### INPUTSTREAM ADAPTIVE #####
@@ -130,6 +145,12 @@ WIDEVINE_PSSH = bytearray([112, 115, 115, 104])
 
 DEFAULT_USERAGENT = 'okhttp/4.9.3'
 DEFAULT_WORKERS = 5
+MAX_WORKERS = 10
+WORKER_IDLE_TIMEOUT = 30
+MAX_HOST_REQUESTS = 6
+TASK_PRIORITY_HIGH = 0
+TASK_PRIORITY_NORMAL = 5
+TASK_PRIORITY_LOW = 10
 
 #### BOOKMARKS #####
 BOOKMARK_FILE = os.path.join(ADDON_PROFILE, 'bookmarks.json')
@@ -142,6 +163,9 @@ DEFAULT_PORT = 52103
 HOST = '127.0.0.1'
 ERROR_URL = 'error.m3u8'
 STOP_URL = 'stop.m3u8'
+SESSION_URL = 'session'
+SESSION_PATH = SESSION_URL+'/{}/'
+PLUGIN_REQUESTS_FILE = os.path.join('resources', 'lib', 'plugin_requests.py')
 EMPTY_TS = 'empty.ts' if KODI_VERSION < 19 else ''
 #################
 
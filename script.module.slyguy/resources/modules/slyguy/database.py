@@ -1,14 +1,20 @@
 import os
 import json
+import zlib
 
 import time
 import peewee
 from six.moves import cPickle
 
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
 from slyguy import signals
 from slyguy.log import log
 from slyguy.util import hash_6
-from slyguy.constants import DB_PATH, DB_PRAGMAS, DB_TABLENAME, ADDON_DEV
+from slyguy.constants import DB_PATH, DB_PRAGMAS, DB_TABLENAME, DB_VACUUM_RATIO, DB_COMPRESS_THRESHOLD, ADDON_DEV
 
 
 if ADDON_DEV and not int(os.environ.get('QUIET', 0)):
@@ -35,6 +41,51 @@ class PickleField(peewee.BlobField):
             pickled = cPickle.dumps(value)
             return self._constructor(pickled)
 
+class CompressedPickleField(PickleField):
+    # first byte is the codec. pickles never start with these so older uncompressed rows still load
+    RAW = b'\x00'
+    ZLIB = b'\x01'
+    LZMA = b'\x02'
+
+    def __init__(self, codec=ZLIB, threshold=DB_COMPRESS_THRESHOLD, *args, **kwargs):
+        if codec == self.LZMA and lzma is None:
+            codec = self.ZLIB
+        self._codec = codec
+        self._threshold = threshold
+        super(CompressedPickleField, self).__init__(*args, **kwargs)
+
+    def python_value(self, value):
+        if value is None:
+            return None
+
+        if isinstance(value, peewee.buffer_type):
+            value = bytes(value)
+
+        codec = value[0:1]
+        if codec == self.ZLIB:
+            value = zlib.decompress(value[1:])
+        elif codec == self.LZMA:
+            value = lzma.decompress(value[1:])
+        elif codec == self.RAW:
+            value = value[1:]
+
+        return cPickle.loads(value)
+
+    def db_value(self, value):
+        if value is None:
+            return None
+
+        pickled = cPickle.dumps(value)
+        if len(pickled) < self._threshold:
+            data = self.RAW + pickled
+        elif self._codec == self.LZMA:
+            data = self.LZMA + lzma.compress(pickled)
+        else:
+            data = self.ZLIB + zlib.compress(pickled)
+
+        return self._constructor(data)
+
+
 class JSONField(peewee.TextField):
     def db_value(self, value):
         if value is not None:
@@ -130,6 +181,17 @@ def close(db=None):
         db.close()
 
 
+def maintenance(db=None):
+    db = db or get_db()
+    if not db:
+        return
+
+    try:
+        db.maintenance()
+    except Exception as e:
+        log.warning("DB Maintenance failed: {}: {}".format(db.database, e))
+
+
 def delete(db=None):
     db = db or get_db()
     if not db:
@@ -149,10 +211,12 @@ def get_db(db_path=DB_PATH):
 class Database(peewee.SqliteDatabase):
     def __init__(self, database, *args, **kwargs):
         self._tables = kwargs.pop('tables', [])
+        reset = kwargs.pop('reset', True)
         for table in self._tables:
             table._meta.database = self
         signals.add(signals.ON_EXIT, lambda db=self: close(db))
-        signals.add(signals.AFTER_RESET, lambda db=self: delete(db))
+        if reset:
+            signals.add(signals.AFTER_RESET, lambda db=self: delete(db))
         super(Database, self).__init__(database, *args, **kwargs)
 
     def register_function(self, fn, name=None, num_params=-1):
@@ -165,16 +229,51 @@ class Database(peewee.SqliteDatabase):
             return
 
         log.debug("Closing db: {}".format(self.database))
-        self.execute_sql('VACUUM')
         super(Database, self).close(*args, **kwargs)
 
+    def _create_missing(self):
+        if not self._tables:
+            return
+
+        existing = [row[0] for row in self.execute_sql("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")]
+        for table in self._tables:
+            names = [table._meta.table_name] + [index._name for index in table._meta.fields_to_index()]
+            if [name for name in names if name not in existing]:
+                log.debug("Creating missing tables / indexes: {}".format(self.database))
+                self.create_tables(self._tables, safe=True)
+                return
+
+    def _pragma(self, name):
+        return self.execute_sql('PRAGMA {}'.format(name)).fetchone()[0]
+
+    def _timed(self, name, sql):
+        start = time.time()
+        self.execute_sql(sql).fetchall()
+        log.debug("DB Maintenance: {} {} took {:.3f}s".format(self.database, name, time.time() - start))
+
+    def maintenance(self, vacuum_ratio=DB_VACUUM_RATIO):
+        page_count = self._pragma('page_count')
+        freelist_count = self._pragma('freelist_count')
+        log.debug("DB Maintenance: {} pages: {} free: {}".format(self.database, page_count, freelist_count))
+
+        self._timed('checkpoint', 'PRAGMA wal_checkpoint(TRUNCATE)')
+        if freelist_count:
+            if self._pragma('auto_vacuum') == 2:
+                self._timed('incremental vacuum', 'PRAGMA incremental_vacuum')
+            elif page_count and freelist_count / float(page_count) >= vacuum_ratio:
+                # also converts older dbs to incremental auto vacuum
+                self._timed('vacuum', 'VACUUM')
+        self._timed('analyze', 'ANALYZE')
+
     def connect(self, *args, **kwargs):
         if not self.is_closed():
             return
 
         log.debug("Connecting to db: {}".format(self.database))
         if os.path.exists(self.database):
-            return super(Database, self).connect(*args, **kwargs)
+            result = super(Database, self).connect(*args, **kwargs)
+            self._create_missing()
+            return result
 
         try:
             os.makedirs(os.path.dirname(self.database))
@@ -200,7 +299,8 @@ class Database(peewee.SqliteDatabase):
         return result
 
 
-def init(tables=None, db_path=DB_PATH):
+# reset=False for dbs shared by all addons so resetting one addon doesnt delete them
+def init(tables=None, db_path=DB_PATH, reset=True):
     if db_path not in DBS:
-        DBS[db_path] = Database(db_path, pragmas=DB_PRAGMAS, timeout=10, autoconnect=True, tables=tables)
+        DBS[db_path] = Database(db_path, pragmas=DB_PRAGMAS, timeout=10, autoconnect=True, tables=tables, reset=reset)
     return DBS[db_path]
@@ -27,4 +27,7 @@ class RouterError(Error):
     pass
 
 class SessionError(Error):
+    pass
+
+class TaskTimeoutError(Error):
     pass
\ No newline at end of file
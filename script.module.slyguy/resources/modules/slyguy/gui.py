@@ -1,6 +1,7 @@
 import sys
 import json
 import time
+import zlib
 
 try:
     from urllib.parse import urlparse
@@ -9,12 +10,12 @@ except ImportError:
 
 from kodi_six import xbmcgui, xbmc
 
-from slyguy import settings, _
+from slyguy import settings, userdata, log, _
 from slyguy.constants import *
 from slyguy.router import add_url_args
 from slyguy.smart_urls import get_dns_rewrites
 from slyguy.util import fix_url, set_kodi_string, hash_6, get_url_headers, get_headers_from_url
-from slyguy.session import Session
+from slyguy.session import Session, RawSession
 from slyguy.dialog import * #backwards compatb
 
 
@@ -23,6 +24,9 @@ if KODI_VERSION >= 20:
 
 
 def redirect(location):
+    from slyguy import cache
+    userdata.save()
+    cache.flush()
     xbmc.executebuiltin('Container.Update({},replace)'.format(location))
 
 
@@ -31,11 +35,36 @@ def get_view_id():
 
 
 def refresh():
+    from slyguy import cache
+    userdata.save()
+    cache.flush()
     set_kodi_string('slyguy_refresh', '1')
     xbmc.executebuiltin('Container.Refresh')
 
 
-def get_art_url(url, headers=None):
+def render_settings():
+    return {
+        'proxy_enabled': settings.common_settings.getBool('proxy_enabled', True),
+        'proxy_path': settings.common_settings.get('_proxy_path'),
+    }
+
+
+def register_proxy_session(proxy_path, proxy_data):
+    # post the session straight to the proxy so concurrent plays dont share the window property
+    data = json.dumps(proxy_data, separators=(',', ':'))
+    if proxy_path:
+        try:
+            resp = RawSession().post(proxy_path+SESSION_URL, data=zlib.compress(data.encode('utf8')), headers={'content-type': 'application/octet-stream'}, timeout=5)
+            if resp.ok and resp.text == proxy_data['session_id']:
+                return True
+        except Exception as e:
+            log.debug('Failed to register proxy session: {}'.format(e))
+
+    set_kodi_string('_slyguy_proxy_data', data)
+    return False
+
+
+def get_art_url(url, headers=None, render=None):
     if not url or not url.lower().startswith(('http', 'plugin')):
         return url
 
@@ -46,8 +75,9 @@ def get_art_url(url, headers=None):
     _headers.update(headers or {})
     _headers.update(get_headers_from_url(url))
 
-    if settings.common_settings.getBool('proxy_enabled', True):
-        proxy_path = settings.common_settings.get('_proxy_path')
+    render = render or render_settings()
+    if render['proxy_enabled']:
+        proxy_path = render['proxy_path']
         if proxy_path:
             _headers.update({'session_type': 'art', 'session_addonid': ADDON_ID})
             if not url.lower().startswith(proxy_path.lower()):
@@ -87,7 +117,54 @@ def select(heading=None, options=None, autoclose=None, multi=False, **kwargs):
         return xbmcgui.Dialog().select(heading, _options, **kwargs)
 
 
+class LazySlot(object):
+    # container stored in a slot that is only allocated when first used
+    def __init__(self, slot, factory=dict):
+        self._slot = slot
+        self._factory = factory
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        value = getattr(obj, self._slot)
+        if value is None:
+            value = self._factory()
+            setattr(obj, self._slot, value)
+        return value
+
+    def __set__(self, obj, value):
+        setattr(obj, self._slot, value)
+
+_slot_names = {}
+def get_slot_names(cls):
+    if cls not in _slot_names:
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name in klass.__dict__.get('__slots__', ()):
+                if name != '__dict__' and name not in names:
+                    names.append(name)
+        _slot_names[cls] = names
+    return _slot_names[cls]
+
 class Item(object):
+    __slots__ = ('id', 'label', 'path', 'playable', 'inputstream', 'mimetype', '_is_folder', 'specialsort', 'custom', 'use_proxy',
+        'resume_from', 'force_resume', 'hide_favourites', 'slug', 'no_resume', '_info', '_headers', '_cookies', '_properties',
+        '_art', '_video', '_audio', '_context', '_subtitles', '_proxy_data', '_dns_rewrites',
+        '__dict__') # attributes set by addons that arent slots. only allocated when used
+
+    info = LazySlot('_info')
+    headers = LazySlot('_headers')
+    cookies = LazySlot('_cookies')
+    properties = LazySlot('_properties')
+    art = LazySlot('_art')
+    video = LazySlot('_video')
+    audio = LazySlot('_audio')
+    context = LazySlot('_context', list)
+    subtitles = LazySlot('_subtitles', list)
+    proxy_data = LazySlot('_proxy_data')
+    dns_rewrites = LazySlot('_dns_rewrites')
+
     def __init__(self, id=None, label='', path=None, playable=False, info=None, context=None,
             headers=None, cookies=None, properties=None, is_folder=None, art=None, inputstream=None,
             video=None, audio=None, subtitles=None, use_proxy=True, specialsort=None, custom=None, proxy_data=None,
@@ -96,19 +173,19 @@ class Item(object):
         self.id          = id
         self.label       = label
         self.path        = path
-        self.info        = dict(info or {})
-        self.headers     = dict(headers or {})
-        self.cookies     = dict(cookies or {})
-        self.properties  = dict(properties or {})
-        self.art         = dict(art or {})
-        self.video       = dict(video or {})
-        self.audio       = dict(audio or {})
-        self.context     = list(context or [])
-        self.subtitles   = subtitles or []
+        self._info       = dict(info) if info else None
+        self._headers    = dict(headers) if headers else None
+        self._cookies    = dict(cookies) if cookies else None
+        self._properties = dict(properties) if properties else None
+        self._art        = dict(art) if art else None
+        self._video      = dict(video) if video else None
+        self._audio      = dict(audio) if audio else None
+        self._context    = list(context) if context else None
+        self._subtitles  = subtitles or None
         self.playable    = playable
         self.inputstream = inputstream
-        self.proxy_data  = proxy_data or {}
-        self.dns_rewrites = dns_rewrites or {}
+        self._proxy_data = proxy_data or None
+        self._dns_rewrites = dns_rewrites or None
         self.mimetype    = None
         self._is_folder  = is_folder
         self.specialsort = specialsort #bottom, top
@@ -125,6 +202,23 @@ class Item(object):
             except IndexError:
                 self.slug = self.path
 
+    # only set slots and extra attributes are pickled (route cache)
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in get_slot_names(type(self)):
+            value = getattr(self, name, None)
+            if value is not None:
+                state[name] = value
+        return state
+
+    def __setstate__(self, state):
+        for name in get_slot_names(type(self)):
+            setattr(self, name, None)
+
+        # also loads items pickled before slots (public names)
+        for name in state:
+            setattr(self, name, state[name])
+
     def update(self, **kwargs):
         for key in kwargs:
             setattr(self, key, kwargs[key])
@@ -137,15 +231,22 @@ class Item(object):
     def is_folder(self, value):
         self._is_folder = value
 
-    def get_li(self, playing=False):
-        proxy_path = settings.common_settings.get('_proxy_path')
+    def get_li(self, playing=False, render=None):
+        start = time.time()
+        render = render or render_settings()
+        proxy_path = session_path = render['proxy_path']
+        if playing:
+            # url safe as its part of the proxy path
+            session_id = hash_6(time.time()).replace('+', '-').replace('/', '_')
+            if proxy_path:
+                session_path = u'{}{}'.format(proxy_path, SESSION_PATH.format(session_id))
 
         if KODI_VERSION < 18:
             li = xbmcgui.ListItem()
         else:
             li = xbmcgui.ListItem(offscreen=True)
 
-        info = self.info.copy()
+        info = dict(self._info) if self._info else {}
         if self.label:
             li.setLabel(self.label)
 
@@ -219,12 +320,12 @@ class Item(object):
             if info or self.is_folder:
                 li.setInfo('video', info)
 
-        if self.video:
-            li.addStreamInfo('video', self.video)
-        if self.audio:
-            li.addStreamInfo('audio', self.audio)
+        if self._video:
+            li.addStreamInfo('video', self._video)
+        if self._audio:
+            li.addStreamInfo('audio', self._audio)
 
-        if self.art:
+        if self._art:
             defaults = {
                 'poster': 'thumb',
                 'landscape': 'thumb',
@@ -233,8 +334,8 @@ class Item(object):
             }
 
             art = {}
-            for key in self.art:
-                art[key] = get_art_url(self.art[key])
+            for key in self._art:
+                art[key] = get_art_url(self._art[key], render=render)
 
             for key in defaults:
                 if key not in art:
@@ -249,7 +350,7 @@ class Item(object):
             # Kodi 21+ only
             self.properties['hide_add_remove_favourite'] = 'true'
 
-        context_items = [x for x in self.context]
+        context_items = list(self._context or ())
         if not playing:
             if self.playable:
                 self.properties['IsPlayable'] = 'true'
@@ -289,7 +390,7 @@ class Item(object):
             if 'referer' not in [x.lower() for x in self.headers]:
                 self.headers['referer'] = '%20'
 
-        headers = get_url_headers(self.headers, self.cookies)
+        headers = get_url_headers(self._headers, self._cookies)
         mimetype = self.mimetype
         if not mimetype and self.inputstream:
             mimetype = self.inputstream.mimetype
@@ -300,8 +401,8 @@ class Item(object):
         def get_url(url, plugin_proxy=False):
             _url = url.lower()
 
-            if os.path.exists(xbmc.translatePath(url)) or _url.startswith('special://') or (plugin_proxy and _url.startswith('plugin://')) or (is_http(_url) and self.use_proxy and not _url.startswith(proxy_path)) and settings.common_settings.getBool('proxy_enabled', True):
-                url = u'{}{}'.format(proxy_path, url)
+            if os.path.exists(xbmc.translatePath(url)) or _url.startswith('special://') or (plugin_proxy and _url.startswith('plugin://')) or (is_http(_url) and self.use_proxy and not _url.startswith(proxy_path)) and render['proxy_enabled']:
+                url = u'{}{}'.format(session_path, url)
 
             return url
 
@@ -402,7 +503,7 @@ class Item(object):
             proxy_url = '{}{}.srt'.format(language, '.forced' if forced else '')
             proxy_data['path_subs'][proxy_url] = url
 
-            return u'{}{}'.format(proxy_path, proxy_url)
+            return u'{}{}'.format(session_path, proxy_url)
 
         if self.path and playing:
             self.path = redirect_url(fix_url(self.path))
@@ -421,7 +522,7 @@ class Item(object):
                     'manifest': self.path,
                     'slug': '{}-{}'.format(ADDON_ID, self.slug),
                     'license_url': license_url,
-                    'session_id': hash_6(time.time()),
+                    'session_id': session_id,
                     'audio_whitelist': settings.get('audio_whitelist', ''),
                     'subs_whitelist':  settings.get('subs_whitelist', ''),
                     'audio_description': settings.getBool('audio_description', True),
@@ -503,7 +604,7 @@ class Item(object):
                     if value:
                         proxy_data[key] = value
 
-                if self.subtitles:
+                if self._subtitles:
                     subs = []
                     for sub in self.subtitles:
                         if type(sub) == str:
@@ -517,7 +618,13 @@ class Item(object):
 
                     li.setSubtitles(list(subs))
 
-                set_kodi_string('_slyguy_proxy_data', json.dumps(proxy_data))
+                from slyguy import stats
+                if stats.trace_enabled():
+                    stats.trace('get_li', start)
+                    proxy_data['trace'] = stats.get_trace()
+                    proxy_data['trace_handoff'] = time.time()
+
+                register_proxy_session(proxy_path, proxy_data)
 
                 if headers and '|' not in final_path:
                     final_path = u'{}|{}'.format(final_path, headers)
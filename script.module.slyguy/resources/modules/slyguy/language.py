@@ -311,6 +311,20 @@ class BaseLanguage(object):
     MERGE_NOT_SUPPORTED         = 32220
     TRAILER_CONTEXT_MENU        = 32221
     NOT_SET                     = 32222
+    CACHE_STATS                 = 32223
+    VIEW_CACHE_STATS            = 32224
+    RESET_CACHE_STATS           = 32225
+    CACHE_STATS_LABEL           = 32226
+    CACHE_STATS_PLOT            = 32227
+    ALL_FUNCTIONS               = 32228
+    PLAYBACK_TRACE              = 32229
+    VIEW_PLAYBACK_TRACE         = 32230
+    RESET_PLAYBACK_TRACE        = 32231
+    PLAYBACK_TRACE_LABEL        = 32232
+    PLAYBACK_TRACE_STAGE        = 32233
+    WIDGET_SNAPSHOTS            = 32234
+    WARM_INVOKER                = 32235
+    TASK_TIMEOUT                = 32236
 
     def __init__(self, addon=ADDON):
         self._addon = addon
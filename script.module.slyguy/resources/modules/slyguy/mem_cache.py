@@ -7,21 +7,27 @@ try:
 except ImportError:
     from six.moves import cPickle
 
-from slyguy import signals, router, settings
+from slyguy import signals, router, settings, stats
 from slyguy.log import log
 from slyguy.util import hash_6, set_kodi_string, get_kodi_string
 from slyguy.constants import ADDON_ID, CACHE_EXPIRY, ROUTE_CLEAR_CACHE, ADDON_VERSION
 
 
 cache_key = 'cache.'+ADDON_ID+ADDON_VERSION
+owner_key = cache_key+'.owner'
 
 class Cache(object):
     data = {}
+    owner = None
 
 cache = Cache()
 
 @signals.on(signals.BEFORE_DISPATCH)
 def load():
+    # warm invoker kept our data. drop it if another invocation has saved since
+    if cache.data and cache.owner != get_kodi_string(owner_key):
+        cache.data = {}
+
     if not cache.data and settings.common_settings.getBool('persist_cache', True):
         cache.data = {}
 
@@ -108,16 +114,28 @@ def cached(*args, **kwargs):
             if callable(_key):
                 _key = _key(*args, **kwargs)
 
+            counts = {}
             if not kwargs.pop('_skip_cache', False):
+                row = cache.data.get(_key)
                 value = get(_key)
                 if value != None:
                     log('Cache Hit: {}'.format(_key))
+                    stats.record('mem_cache', f.__name__, hits=1)
                     return value
 
+                counts['misses'] = 1
+                if row is not None:
+                    counts['stale'] = 1
+
+            start = time()
             value = f(*args, **kwargs)
+            counts.update(fetches=1, fetch_time=time() - start)
             if value != None:
                 set(_key, value, expires)
+                if stats.enabled():
+                    counts['payload_bytes'] = len(cPickle.dumps(value, protocol=0))
 
+            stats.record('mem_cache', f.__name__, **counts)
             return value
 
         return decorated_function
@@ -138,10 +156,16 @@ def remove_expired():
 
     if delete:
         log('Mem Cache: Deleted {} Expired Rows'.format(len(delete)))
+        stats.record('mem_cache', stats.ALL_FUNCS, evictions=len(delete))
 
     if settings.common_settings.getBool('persist_cache', True):
         set_kodi_string(cache_key, cPickle.dumps(cache.data, protocol=0).decode('latin1'))
-        cache.data.clear()
+        if settings.common_settings.getBool('warm_invoker', False):
+            cache.owner = hash_6(time())
+            set_kodi_string(owner_key, cache.owner)
+        else:
+            set_kodi_string(owner_key, '')
+            cache.data.clear()
 
 @router.route(ROUTE_CLEAR_CACHE)
 def clear_cache(key, **kwargs):
@@ -13,10 +13,10 @@ except ImportError:
 
 from kodi_six import xbmc, xbmcplugin
 
-from slyguy import router, gui, settings, userdata, inputstream, signals, migrate, bookmarks, mem_cache, is_donor, log, _
+from slyguy import router, gui, settings, userdata, inputstream, signals, migrate, bookmarks, mem_cache, stats, is_donor, log, _
 from slyguy.constants import *
 from slyguy.exceptions import Error, PluginError, CancelDialog
-from slyguy.util import set_kodi_string, get_addon, remove_file, user_country
+from slyguy.util import set_kodi_string, get_addon, remove_file, user_country, async_tasks, run_plugin
 from slyguy.settings.types import Category
 
 
@@ -56,22 +56,52 @@ def login_required():
     return lambda f: decorator(f)
 
 # @plugin.route()
-def route(url=None):
+def route(url=None, cache=None, cache_vary=None, snapshot=None):
     def decorator(f, url):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            item = f(*args, **kwargs)
-
             autoplay = kwargs.get(ROUTE_AUTOPLAY_TAG, None)
             autofolder = kwargs.get(ROUTE_AUTOFOLDER_TAG, None)
+            refresh = kwargs.pop(ROUTE_REFRESH_TAG, None)
+            if refresh:
+                kwargs[ROUTE_URL_TAG] = _route_url(kwargs)
+
+            key = None
+            if (cache or snapshot) and autoplay is None and autofolder is None:
+                key = _route_cache_key(kwargs, cache_vary)
+
+            start = time.time()
+            if key and snapshot and settings.common_settings.getBool('widget_snapshots', False):
+                item = None
+                if not refresh:
+                    _route_snapshot_touch(kwargs)
+                    item = _route_snapshot_get(f.__name__, key, kwargs)
+
+                if item is None:
+                    item = f(*args, **kwargs)
+                    if isinstance(item, Folder):
+                        _route_snapshot_set(key, item, snapshot)
+
+                if refresh:
+                    return resolve()
+            else:
+                key = key if cache else None
+                item = _route_cache_get(f.__name__, key)
+                if item is None:
+                    item = f(*args, **kwargs)
+                    if key and isinstance(item, Folder):
+                        _route_cache_set(key, item, cache)
 
             if autoplay is not None and isinstance(item, Folder):
                 _autoplay(item, autoplay, playable=True)
             elif autofolder is not None and isinstance(item, Folder):
                 _autoplay(item, autofolder, playable=False)
+            elif kwargs.get(PREFETCH_TAG):
+                resolve()
             elif isinstance(item, Folder):
                 item.display()
             elif isinstance(item, Item):
+                stats.trace(u'route {}'.format(f.__name__), start)
                 item.play(**kwargs)
             else:
                 resolve()
@@ -80,6 +110,88 @@ def route(url=None):
         return decorated_function
     return lambda f: decorator(f, url)
 
+def _route_cache_key(kwargs, cache_vary=None):
+    from slyguy import cache
+
+    if not cache.enabled() or ROUTE_URL_TAG not in kwargs:
+        return None
+
+    generation = cache.get(ROUTE_CACHE_GEN_KEY)
+    if generation is None:
+        generation = clear_route_cache()
+
+    vary = cache_vary() if callable(cache_vary) else cache_vary
+    return u'route{}{}{}{}{}'.format(_route_url(kwargs), generation, vary or '', settings.getBool('kiosk', False), settings.getInt('pagination_multiplier') or 1)
+
+def _route_url(kwargs):
+    return router.add_url_args(kwargs[ROUTE_URL_TAG], **{ROUTE_REFRESH_TAG: None})
+
+def _route_cache_get(func_name, key):
+    from slyguy import cache
+
+    if not key:
+        return None
+
+    folder = cache.get(key)
+    if folder is None:
+        stats.record('route', func_name, misses=1)
+    else:
+        log.debug('Route Cache Hit: {}'.format(key))
+        stats.record('route', func_name, hits=1)
+
+    return folder
+
+def _route_cache_set(key, folder, expires):
+    from slyguy import cache
+
+    try:
+        cache.set(key, folder, expires=expires)
+    except Exception as e:
+        log.debug('Route Cache: Failed to save: {}'.format(e))
+
+def _route_snapshot_get(func_name, key, kwargs):
+    from slyguy import cache
+
+    entry = cache.get(u'snapshot' + key)
+    if entry is None:
+        stats.record('snapshot', func_name, misses=1)
+        return None
+
+    fresh_until, folder = entry
+    if fresh_until < time.time():
+        log.debug('Route Snapshot Stale: {}'.format(key))
+        cache.set(u'snapshot' + key, (time.time() + ROUTE_SNAPSHOT_RETRY, folder), expires=ROUTE_SNAPSHOT_EXPIRY)
+        run_plugin(router.add_url_args(_route_url(kwargs), **{ROUTE_REFRESH_TAG: 1}))
+        stats.record('snapshot', func_name, hits=1, stale=1)
+    else:
+        log.debug('Route Snapshot Hit: {}'.format(key))
+        stats.record('snapshot', func_name, hits=1)
+
+    return folder
+
+def _route_snapshot_set(key, folder, fresh):
+    from slyguy import cache
+
+    try:
+        cache.set(u'snapshot' + key, (time.time() + fresh, folder), expires=ROUTE_SNAPSHOT_EXPIRY)
+    except Exception as e:
+        log.debug('Route Snapshot: Failed to save: {}'.format(e))
+
+def _route_snapshot_touch(kwargs):
+    url = _route_url(kwargs)
+    paths = settings.common_settings.getDict('_snapshot_paths', {})
+    now = int(time.time())
+    if now - paths.get(url, 0) > ROUTE_SNAPSHOT_TOUCH:
+        paths[url] = now
+        settings.common_settings.setDict('_snapshot_paths', paths)
+
+def clear_route_cache():
+    from slyguy import cache
+
+    generation = int(time.time()*1000)
+    cache.set(ROUTE_CACHE_GEN_KEY, generation, expires=ROUTE_CACHE_GEN_EXPIRY, immediate=True)
+    return generation
+
 # @plugin.plugin_middleware()
 def plugin_middleware():
     log.debug('@plugin.plugin_middleware() is deprecated. Use @plugin.plugin_request() instead')
@@ -207,18 +319,29 @@ def pagination(key=None):
                 kwargs['page'] = real_page
 
             items = []
-            for i in range(multiplier):
-                if key is None:
-                    folder, more_results = f(**kwargs)
-                    kwargs['page'] += 1
-                else:
+            if key is None:
+                folder, more_results = f(**kwargs)
+                items.extend(folder.items)
+
+                if more_results and multiplier > 1:
+                    tasks = [lambda _page=_page: f(**dict(kwargs, page=_page)) for _page in range(real_page+1, real_page+multiplier)]
+                    for result in async_tasks(tasks, raise_on_error=False):
+                        if isinstance(result, Exception):
+                            raise result
+
+                        folder, more_results = result
+                        items.extend(folder.items)
+                        if not more_results:
+                            break
+            else:
+                for i in range(multiplier):
                     folder, key_val = f(**kwargs)
                     kwargs[key] = key_val
                     more_results = key_val
 
-                items.extend(folder.items)
-                if not more_results:
-                    break
+                    items.extend(folder.items)
+                    if not more_results:
+                        break
 
             folder.items = items
 
@@ -646,23 +769,37 @@ def live_or_start(seconds=1):
     else:
         return 0
 
+def render_settings():
+    render = gui.render_settings()
+    render['bookmarks'] = settings.getBool('bookmarks', True)
+    render['quality_context'] = not NEW_SETTINGS or is_donor()
+    return render
+
 #Plugin.Item()
 class Item(gui.Item):
+    __slots__ = ('cache_key', '_play_next', '_callback', '_play_skips', 'geolock', 'bookmark', 'quality')
+
+    play_next = gui.LazySlot('_play_next')
+    callback = gui.LazySlot('_callback')
+    play_skips = gui.LazySlot('_play_skips', list)
+
     def __init__(self, cache_key=None, play_next=None, callback=None, play_skips=None, geolock=None, bookmark=True, quality=None, *args, **kwargs):
-        super(Item, self).__init__(self, *args, **kwargs)
+        # None fills the id position so positional args keep mapping from label
+        super(Item, self).__init__(None, *args, **kwargs)
         self.cache_key = cache_key
-        self.play_next = dict(play_next or {})
-        self.callback = dict(callback or {})
-        self.play_skips = play_skips or []
+        self._play_next = dict(play_next) if play_next else None
+        self._callback = dict(callback) if callback else None
+        self._play_skips = play_skips or None
         self.geolock = geolock
         self.bookmark = bookmark
         self.quality = quality
 
-    def get_li(self, *args, **kwargs):
+    def get_li(self, playing=False, render=None):
+        render = render or render_settings()
         # if settings.getBool('use_cache', True) and self.cache_key:
         #     url = url_for(ROUTE_CLEAR_CACHE, key=self.cache_key)
         #     self.context.append((_.PLUGIN_CONTEXT_CLEAR_CACHE, 'RunPlugin({})'.format(url)))
-        if settings.getBool('bookmarks', True) and self.bookmark:
+        if render['bookmarks'] and self.bookmark:
             url = url_for(add_bookmark, path=self.path, label=self.label, thumb=self.art.get('thumb'), folder=int(self.is_folder), playable=int(self.playable))
             self.context.append((_.ADD_BOOKMARK, 'RunPlugin({})'.format(url)))
 
@@ -676,11 +813,11 @@ class Item(gui.Item):
             self.art['thumb'] = self.art.get('thumb') or default_thumb
             self.art['fanart'] = self.art.get('fanart') or default_fanart
 
-        if self.path and self.playable and (not NEW_SETTINGS or is_donor()):
+        if self.path and self.playable and render['quality_context']:
             url = router.add_url_args(self.path, **{QUALITY_TAG: QUALITY_ASK})
             self.context.append((_.SELECT_QUALITY, 'PlayMedia({},noresume)'.format(url)))
 
-        return super(Item, self).get_li(*args, **kwargs)
+        return super(Item, self).get_li(playing=playing, render=render)
 
     def play(self, **kwargs):
         self.playable = True
@@ -719,6 +856,8 @@ class Item(gui.Item):
             play_data['next'].update(self.play_next)
             if play_data['next']['next_file']:
                 play_data['next']['next_file'] = router.add_url_args(play_data['next']['next_file'], _play=1)
+                if play_data['next'].pop('prefetch', False):
+                    play_data['next']['prefetch_file'] = router.add_url_args(play_data['next']['next_file'], **{PREFETCH_TAG: 1})
 
         if self.callback:
             play_data['callback'].update(self.callback)
@@ -769,6 +908,8 @@ class Folder(object):
         menu_view_shows_seasons = settings.common_settings.getBool('menu_view_shows_seasons', False)
 
         handle = _handle()
+        render = render_settings()
+        listing = []
         count = 0.0
         item_types = {}
         ep_sort = True
@@ -806,8 +947,10 @@ class Folder(object):
                 item_types[media_type] += 1
                 count += 1
 
-            li = item.get_li()
-            xbmcplugin.addDirectoryItem(handle, item.path, li, item.is_folder)
+            li = item.get_li(render=render)
+            listing.append((item.path, li, item.is_folder))
+
+        xbmcplugin.addDirectoryItems(handle, listing, len(listing))
 
         top_type = percent = None
         if item_types:
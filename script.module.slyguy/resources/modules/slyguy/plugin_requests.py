@@ -0,0 +1,81 @@
+import os
+
+try:
+    from urllib.parse import parse_qsl, urlparse
+except ImportError:
+    from six.moves.urllib_parse import parse_qsl, urlparse
+
+from kodi_six import xbmc, xbmcaddon
+
+from slyguy import log
+from slyguy.constants import ROUTE_TAG, PLUGIN_REQUESTS_FILE
+
+
+_handlers = {}
+
+# in an addons resources/lib/plugin_requests.py
+# @plugin_requests.handler('license_request')
+def handler(route):
+    def decorator(func):
+        func._plugin_request_route = route
+        return func
+    return decorator
+
+def _load_source(name, path):
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp
+        return imp.load_source(name, path)
+
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def get_handlers(addon_id):
+    try:
+        addon = xbmcaddon.Addon(addon_id)
+    except Exception:
+        return {}
+
+    # reload if the addon has been updated
+    version = addon.getAddonInfo('version')
+    if addon_id in _handlers and _handlers[addon_id][0] == version:
+        return _handlers[addon_id][1]
+
+    handlers = {}
+    path = os.path.join(xbmc.translatePath(addon.getAddonInfo('path')), PLUGIN_REQUESTS_FILE)
+    if os.path.exists(path):
+        try:
+            module = _load_source('plugin_requests_{}'.format(addon_id.replace('.', '_')), path)
+        except Exception as e:
+            log.exception(e)
+        else:
+            for name in dir(module):
+                route = getattr(getattr(module, name), '_plugin_request_route', None)
+                if route:
+                    handlers[route] = getattr(module, name)
+            log.debug('Loaded {} plugin request handlers for {}'.format(len(handlers), addon_id))
+
+    _handlers[addon_id] = (version, handlers)
+    return handlers
+
+# returns None if there is no in-process handler (or it failed) so the caller can fall back to run_plugin
+def call(url, **kwargs):
+    parsed = urlparse(url)
+    if parsed.scheme.lower() != 'plugin':
+        return None
+
+    params = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    route = parsed.path.rstrip('/') or params.pop(ROUTE_TAG, '')
+    func = get_handlers(parsed.netloc).get(route)
+    if not func:
+        return None
+
+    params.update(kwargs)
+    try:
+        return func(**params) or {}
+    except Exception as e:
+        log.exception(e)
+        return None
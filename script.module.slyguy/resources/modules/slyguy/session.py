@@ -5,7 +5,10 @@ import re
 import os
 import functools
 import random
+import threading
+from time import time
 from gzip import GzipFile
+from email.utils import parsedate_tz, mktime_tz
 from ssl import OPENSSL_VERSION
 
 import requests
@@ -18,13 +21,12 @@ except ImportError:
     from six.moves.urllib_parse import urlparse
 
 from kodi_six import xbmc
-import dns.resolver
 
-from slyguy import userdata, settings, signals, mem_cache, log, _
+from slyguy import userdata, settings, signals, mem_cache, stats, log, _
 from slyguy.util import get_kodi_proxy
 from slyguy.smart_urls import get_dns_rewrites
 from slyguy.exceptions import SessionError, Error
-from slyguy.constants import DEFAULT_USERAGENT, CHUNK_SIZE, KODI_VERSION
+from slyguy.constants import DEFAULT_USERAGENT, CHUNK_SIZE, KODI_VERSION, HTTP_CACHE_STALE, MAX_HOST_REQUESTS
 from slyguy.settings import IPMode
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -44,7 +46,7 @@ SSL_CIPHERS = SSL_CIPHERS.split(':')
 random.shuffle(SSL_CIPHERS)
 SSL_CIPHERS = ':'.join(SSL_CIPHERS)
 SSL_OPTIONS = urllib3.util.ssl_.OP_NO_SSLv2 | urllib3.util.ssl_.OP_NO_SSLv3 | urllib3.util.ssl_.OP_NO_COMPRESSION | urllib3.util.ssl_.OP_NO_TICKET
-DNS_CACHE = dns.resolver.Cache()
+DNS_CACHE = None
 
 def json_override(func, error_msg):
     try:
@@ -53,11 +55,55 @@ def json_override(func, error_msg):
         raise SessionError(error_msg or _.JSON_ERROR)
 
 
+def cache_control(headers, default_ttl):
+    directives = {}
+    for part in headers.get('Cache-Control', '').lower().split(','):
+        name, _sep, value = part.strip().partition('=')
+        if name:
+            directives[name] = value.strip('"')
+
+    if 'no-store' in directives:
+        return None
+
+    if 'no-cache' in directives:
+        return 0
+
+    try:
+        return max(int(directives['max-age']) - int(headers.get('Age', 0)), 0)
+    except (KeyError, ValueError):
+        pass
+
+    try:
+        return max(mktime_tz(parsedate_tz(headers['Expires'])) - mktime_tz(parsedate_tz(headers['Date'])), 0)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        pass
+
+    return default_ttl
+
+
 OPEN_SESSIONS = []
 @signals.on(signals.AFTER_DISPATCH)
-def close_sessions():
-    for session in OPEN_SESSIONS:
-        session.close()
+def close_sessions(force=False):
+    # warm invoker keeps sessions used in this dispatch (and their sockets) open for the next one
+    warm = not force and settings.common_settings.getBool('warm_invoker', False)
+    for session in list(OPEN_SESSIONS):
+        if warm and session._used:
+            session._used = False
+        else:
+            session.close()
+
+signals.add(signals.ON_EXIT, lambda: close_sessions(force=True))
+
+
+HOST_LIMITS = {}
+HOST_LIMITS_LOCK = threading.Lock()
+def host_limit(url):
+    # caps requests in flight to one host across all worker threads
+    host = urlparse(url).netloc.lower()
+    with HOST_LIMITS_LOCK:
+        if host not in HOST_LIMITS:
+            HOST_LIMITS[host] = threading.BoundedSemaphore(MAX_HOST_REQUESTS)
+        return HOST_LIMITS[host]
 
 
 class DOHResolver(object):
@@ -108,10 +154,28 @@ class SocketResolver(object):
             return []
 
 
-class DNSResolver(dns.resolver.Resolver):
+class DNSResolver(object):
+    def __init__(self):
+        global DNS_CACHE
+        import dns.resolver
+
+        if DNS_CACHE is None:
+            DNS_CACHE = dns.resolver.Cache()
+
+        self._resolver = dns.resolver.Resolver(configure=False)
+        self._resolver.cache = DNS_CACHE
+
+    @property
+    def nameservers(self):
+        return self._resolver.nameservers
+
+    @nameservers.setter
+    def nameservers(self, value):
+        self._resolver.nameservers = value
+
     def resolve(self, host, family, interface_ip=None):
         try:
-            return [x.to_text() for x in self.query(host, rdtype='AAAA' if family == socket.AF_INET6 else 'A', source=interface_ip)]
+            return [x.to_text() for x in self._resolver.query(host, rdtype='AAAA' if family == socket.AF_INET6 else 'A', source=interface_ip)]
         except:
             return []
 
@@ -226,6 +290,8 @@ class RawSession(requests.Session):
         self._cert = None
         self._ssl_ciphers = ssl_ciphers
         self._ssl_options = ssl_options
+        self._used = False
+        self._auto_close = auto_close
 
         if auto_close:
             OPEN_SESSIONS.append(self)
@@ -311,6 +377,10 @@ class RawSession(requests.Session):
         self.close()
 
     def request(self, method, url, **kwargs):
+        self._used = True
+        if self._auto_close and self not in OPEN_SESSIONS:
+            OPEN_SESSIONS.append(self)
+
         req = requests.Request(method, url, params=kwargs.pop('params', None))
         url = req.prepare().url
 
@@ -347,8 +417,7 @@ class RawSession(requests.Session):
                         if entry[1].lower().startswith('http'):
                             resolver = DOHResolver()
                         else:
-                            resolver = DNSResolver(configure=False)
-                            resolver.cache = DNS_CACHE
+                            resolver = DNSResolver()
 
                         resolver.nameservers = [entry[1],]
                         session_data['resolver'] = [urlparse(session_data['url']).netloc.lower(), resolver]
@@ -428,8 +497,9 @@ class Session(RawSession):
         json_text = GzipFile(fileobj=BytesIO(resp.content)).read()
         return json.loads(json_text)
 
-    def request(self, method, url, timeout=None, attempts=None, verify=None, error_msg=None, retry_not_ok=False, retry_delay=1000, log_url=None, return_json=None, **kwargs):
+    def request(self, method, url, timeout=None, attempts=None, verify=None, error_msg=None, retry_not_ok=False, retry_delay=1000, log_url=None, return_json=None, cache_ttl=None, cache_vary=None, cache_validate=None, **kwargs):
         method = method.upper()
+        start = time()
 
         if not url.startswith('http'):
             url = self._base_url.format(url)
@@ -443,42 +513,68 @@ class Session(RawSession):
         if verify is not None:
             kwargs['verify'] = verify
 
-        for i in range(1, attempts+1):
-            attempt = 'Attempt {}/{}: '.format(i, attempts)
-            if i > 1 and retry_delay:
-                xbmc.sleep(retry_delay)
+        cache_key = cache_entry = None
+        if cache_ttl is not None and method == 'GET':
+            cache_key, cache_entry = self._cache_get(url, kwargs.get('params'), cache_vary)
 
-            if self.before_request:
-                self.before_request()
+        if cache_entry and cache_entry['fresh_until'] > time():
+            log.debug('HTTP Cache Hit: {}'.format(log_url or url))
+            resp = self._cached_response(cache_entry)
+            if return_json:
+                data = resp.json()
+        else:
+            if cache_entry:
+                headers = kwargs['headers'] = dict(kwargs.get('headers') or {})
+                if cache_entry['headers'].get('ETag'):
+                    headers['If-None-Match'] = cache_entry['headers']['ETag']
+                if cache_entry['headers'].get('Last-Modified'):
+                    headers['If-Modified-Since'] = cache_entry['headers']['Last-Modified']
 
-            log.debug('{}{} {}'.format(attempt, method, log_url or url))
+            for i in range(1, attempts+1):
+                attempt = 'Attempt {}/{}: '.format(i, attempts)
+                if i > 1 and retry_delay:
+                    xbmc.sleep(retry_delay)
 
-            try:
-                resp = super(Session, self).request(method, url, **kwargs)
-            except SessionError:
-                if i == attempts:
-                    raise
-                else:
-                    continue
-            except Exception as e:
-                #log.exception(e) #causes log spam in service loop when no internet
-                raise SessionError(error_msg or _.NO_RESPONSE_ERROR)
+                if self.before_request:
+                    self.before_request()
 
-            if retry_not_ok and not resp.ok:
-                continue
+                log.debug('{}{} {}'.format(attempt, method, log_url or url))
 
-            if return_json:
                 try:
-                    data = resp.json()
-                except:
+                    with host_limit(url):
+                        resp = super(Session, self).request(method, url, **kwargs)
+                except SessionError:
                     if i == attempts:
                         raise
                     else:
                         continue
+                except Exception as e:
+                    #log.exception(e) #causes log spam in service loop when no internet
+                    raise SessionError(error_msg or _.NO_RESPONSE_ERROR)
 
-            break
+                if cache_entry and resp.status_code == 304:
+                    log.debug('HTTP Cache Revalidated: {}'.format(log_url or url))
+                    resp = self._cached_response(cache_entry, resp.headers)
+                elif retry_not_ok and not resp.ok:
+                    continue
+
+                if return_json:
+                    try:
+                        data = resp.json()
+                    except:
+                        if i == attempts:
+                            raise
+                        else:
+                            continue
+
+                break
+
+            # cache_validate lets callers keep error bodies sent with a 200 out of the cache
+            if cache_key and resp.status_code == 200 and (not cache_validate or cache_validate(resp)):
+                self._cache_set(cache_key, resp, cache_ttl)
 
         resp.json = lambda func=resp.json, error_msg=error_msg: json_override(func, error_msg)
+        stats.trace(u'{} {}'.format(method, urlparse(url).path), start)
 
         if self.after_request:
             self.after_request(resp)
@@ -488,6 +584,50 @@ class Session(RawSession):
         else:
             return resp
 
+    def _cache_get(self, url, params=None, vary=None):
+        from slyguy import cache
+
+        url = requests.Request('GET', url, params=params).prepare().url
+        key = u'http_cache{}{}'.format(url, vary or '')
+        return key, cache.get(key)
+
+    def _cache_set(self, key, resp, default_ttl):
+        from slyguy import cache
+
+        ttl = cache_control(resp.headers, default_ttl)
+        if ttl is None or not cache.enabled():
+            return
+
+        headers = {name: resp.headers[name] for name in ('Content-Type', 'ETag', 'Last-Modified') if name in resp.headers}
+        entry = {
+            'url': resp.url,
+            'status': resp.status_code,
+            'headers': headers,
+            'encoding': resp.encoding,
+            'content': resp.content,
+            'fresh_until': time() + ttl,
+        }
+
+        # validators let us keep the entry around past its ttl and revalidate with a 304
+        expires = max(ttl, HTTP_CACHE_STALE) if 'ETag' in headers or 'Last-Modified' in headers else ttl
+        if expires:
+            cache.set(key, entry, expires)
+
+    def _cached_response(self, entry, headers=None):
+        resp = requests.models.Response()
+        resp.status_code = entry['status']
+        resp.headers = requests.structures.CaseInsensitiveDict(entry['headers'])
+        resp.encoding = entry['encoding']
+        resp.url = entry['url']
+        resp._content = entry['content']
+        resp.from_cache = True
+
+        if headers is not None:
+            # 304 response headers replace the stored ones
+            resp.headers.update({name: headers[name] for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Date') if name in headers})
+
+        return resp
+
     def save_cookies(self):
         if not self._cookies_key:
             raise Exception('A cookies key needs to be set to save cookies')
@@ -298,6 +298,12 @@ class CommonSettings(BaseSettings):
         after_clear=set_trailer_context, disabled_value=False, disabled_reason=_.SUPPORTER_ONLY, override=False, owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
     UPDATE_ADDONS = Action("RunPlugin(plugin://{}/?_=update_addons)".format(COMMON_ADDON_ID), owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
     CHECK_LOG = Action("RunPlugin(plugin://{}/?_=check_log)".format(COMMON_ADDON_ID), owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
+    CACHE_STATS = Bool('cache_stats', default=False, override=False, owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
+    VIEW_CACHE_STATS = Action("ActivateWindow(Videos,plugin://{}/?_=cache_stats,return)".format(COMMON_ADDON_ID), owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
+    PLAYBACK_TRACE = Bool('playback_trace', default=False, override=False, owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
+    VIEW_PLAYBACK_TRACE = Action("ActivateWindow(Videos,plugin://{}/?_=playback_trace,return)".format(COMMON_ADDON_ID), owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
+    WIDGET_SNAPSHOTS = Bool('widget_snapshots', default=False, override=False, owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
+    WARM_INVOKER = Bool('warm_invoker', default=False, override=False, owner=COMMON_ADDON_ID, category=Categories.SYSTEM)
 
     # ROOT
     DONOR_ID = Donor('donor_id', override=False, confirm_clear=True, owner=COMMON_ADDON_ID, category=Categories.ROOT)
@@ -314,6 +320,9 @@ class CommonSettings(BaseSettings):
     UPDATES = Dict('updates', visible=False, override=False, owner=COMMON_ADDON_ID)
     NEWS = Dict('news', visible=False, override=False, owner=COMMON_ADDON_ID)
     LAST_UPDATES_CHECK = Number('last_updates_check', visible=False, override=False, owner=COMMON_ADDON_ID)
+    LAST_DB_MAINTENANCE = Number('last_db_maintenance', visible=False, override=False, owner=COMMON_ADDON_ID)
+    LAST_SNAPSHOT_REFRESH = Number('last_snapshot_refresh', visible=False, override=False, owner=COMMON_ADDON_ID)
+    SNAPSHOT_PATHS = Dict('snapshot_paths', visible=False, override=False, owner=COMMON_ADDON_ID)
     WV_LAST_CHECK = Number('wv_last_check', visible=False, override=False, owner=COMMON_ADDON_ID)
     WV_LATEST_HASH = Text('wv_latest_hash', visible=False, override=False, owner=COMMON_ADDON_ID)
     MAC = Number('mac', visible=False, override=False, owner=COMMON_ADDON_ID)
@@ -1,11 +1,13 @@
 import os
 import time
+import itertools
 from collections import defaultdict
 
 import peewee
 from kodi_six import xbmc
 
 from slyguy import database, log, _
+from slyguy.util import get_kodi_string, set_kodi_string
 from slyguy.constants import COMMON_ADDON_ID, COMMON_ADDON, ADDON_ID
 
 
@@ -22,6 +24,8 @@ class Settings(database.Model):
 profile_path = xbmc.translatePath(COMMON_ADDON.getAddonInfo('profile'))
 db_path = os.path.join(profile_path, 'settings.db')
 db = database.init([Settings], db_path)
+changed_key = '_slyguy_settings_changed'
+_tokens = itertools.count()
 
 
 class DBStorage():
@@ -31,6 +35,7 @@ class DBStorage():
     def __init__(self, cache=defaultdict(dict), cache_enabled=True):
         self._cache = cache
         self._cache_enabled = cache_enabled
+        self._changed = None
 
     def get(self, addon_id, key, inherit=True):
         if self._cache_enabled:
@@ -83,17 +88,33 @@ class DBStorage():
     def set(self, addon_id, key, value):
         Settings.replace(addon_id=addon_id, key=key, value=value).execute()
         self._cache[addon_id][key] = (addon_id, value)
+        self._set_changed()
 
     def delete(self, addon_id, key):
         Settings.delete_where(Settings.addon_id == addon_id, Settings.key == key)
         self._cache[addon_id][key] = (addon_id, DBStorage.NO_ENTRY)
+        self._set_changed()
 
     def delete_all(self, addon_id):
         Settings.delete_where(Settings.addon_id == addon_id)
         self._cache.pop(addon_id, None)
+        self._set_changed()
 
     def get_addon_ids(self):
         return [x.addon_id for x in Settings.select(Settings.addon_id).where(Settings.addon_id != COMMON_ADDON_ID).distinct()]
 
+    def _set_changed(self):
+        # lets other processes (service, other plugin invokers) know their cache is stale
+        # token is unique per write. if another process changed settings since our last reset, stay stale
+        stale = self.is_stale()
+        token = '{}.{}.{}'.format(time.time(), os.getpid(), next(_tokens))
+        set_kodi_string(changed_key, token)
+        if not stale:
+            self._changed = token
+
+    def is_stale(self):
+        return get_kodi_string(changed_key) != self._changed
+
     def reset(self):
+        self._changed = get_kodi_string(changed_key)
         self._cache.clear()
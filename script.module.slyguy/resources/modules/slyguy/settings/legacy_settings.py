@@ -18,6 +18,10 @@ def reset():
     global ADDON
     ADDON = xbmcaddon.Addon(ADDON.getAddonInfo('id'))
 
+# no change tracking. always reload
+def check_changed():
+    reset()
+
 def open():
     ADDON.openSettings()
 
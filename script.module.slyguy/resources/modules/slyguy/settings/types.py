@@ -65,6 +65,8 @@ class Categories(object):
 
 USE_DEFAULT = object()
 STORAGE = DBStorage()
+# resolved values, kept until a setting changes
+VALUES = {}
 class Setting(object):
     DEFAULT = None
 
@@ -126,8 +128,17 @@ class Setting(object):
 
     @property
     def value(self):
+        try:
+            return VALUES[self._id]
+        except KeyError:
+            pass
+
         value = self._get_value_owner()[1]
-        return self._default if value == DBStorage.NO_ENTRY else value
+        value = self._default if value == DBStorage.NO_ENTRY else value
+        # kodi conditions can change without a setting changing
+        if not isinstance(self._enable, str):
+            VALUES[self._id] = value
+        return value
 
     @value.setter
     def value(self, value):
@@ -156,9 +167,11 @@ class Setting(object):
 
     def _set_value(self, value):
         STORAGE.set(self.owner, self.id, value)
+        VALUES.clear()
 
     def clear(self):
         STORAGE.delete(self.owner, self._id)
+        VALUES.clear()
         self._after_clear()
 
     @property
@@ -439,6 +452,7 @@ class BaseSettings(object):
     USERDATA = Dict('userdata', visible=False, override=False, inherit=False)
 
     SETTINGS = {}
+    INDEX = {}
     CLASSES = {}
 
     def __init__(self, addon_id=ADDON_ID):
@@ -473,6 +487,7 @@ class BaseSettings(object):
 
                 attr_used[name] = cls
                 self.SETTINGS[setting.id] = setting
+                self._add_index(setting)
 
         DBStorage.SETTINGS = self.SETTINGS
         if addon_id == ADDON_ID:
@@ -496,15 +511,20 @@ class BaseSettings(object):
     def remove(self, key):
         self.get_setting(key).clear()
 
+    def _add_index(self, setting):
+        for id in [setting.id, '_{}'.format(setting.id)] + setting._legacy_ids:
+            self.INDEX.setdefault(id.lower(), setting)
+
     def get_setting(self, key, default=None):
-        for setting in self.SETTINGS.values():
-            if setting.matches_id(key):
-                return setting
+        setting = self.INDEX.get(key.lower())
+        if setting:
+            return setting
 
         owner = self.CLASSES[self.__class__]
         setting = Dict(key, owner=owner, default=default, override=False, inherit=False, visible=False)
         setting._label = getattr(self.language, key, key.upper())
         self.SETTINGS[key] = setting
+        self._add_index(setting)
         # setting will be deleted on next load
         log.warning("Setting '{}' not found. Created on-the-fly.".format(key))
         return setting
@@ -512,7 +532,17 @@ class BaseSettings(object):
     def reset(self):
         reset()
 
+    def check_changed(self):
+        check_changed()
+
 
 @signals.on(signals.BEFORE_DISPATCH)
+def check_changed():
+    if STORAGE.is_stale():
+        signals.emit(signals.ON_SETTINGS_CHANGE)
+
+
+@signals.on(signals.ON_SETTINGS_CHANGE)
 def reset():
     STORAGE.reset()
+    VALUES.clear()
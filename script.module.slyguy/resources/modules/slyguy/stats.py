@@ -0,0 +1,173 @@
+import os
+import threading
+from time import time
+from collections import defaultdict, deque
+
+import peewee
+from kodi_six import xbmc
+
+from slyguy import database, settings, signals
+from slyguy.log import log
+from slyguy.constants import COMMON_ADDON, ADDON_ID
+
+ALL_FUNCS = '*'
+TRACE_MAX_STAGES = 200
+TRACE_MAX_SESSIONS = 20
+
+
+class CacheStats(database.Model):
+    addon_id = peewee.CharField()
+    cache = peewee.CharField()
+    func = peewee.CharField()
+    hits = peewee.IntegerField(default=0)
+    misses = peewee.IntegerField(default=0)
+    stale = peewee.IntegerField(default=0)
+    evictions = peewee.IntegerField(default=0)
+    fetches = peewee.IntegerField(default=0)
+    fetch_time = peewee.FloatField(default=0)
+    payload_bytes = peewee.IntegerField(default=0)
+    updated = peewee.IntegerField(default=0)
+
+    class Meta:
+        primary_key = peewee.CompositeKey('addon_id', 'cache', 'func')
+        table_name = 'cache_stats'
+
+    @property
+    def lookups(self):
+        return self.hits + self.misses
+
+    @property
+    def hit_ratio(self):
+        return self.hits / float(self.lookups) if self.lookups else 0
+
+    @property
+    def avg_fetch_ms(self):
+        return self.fetch_time * 1000 / self.fetches if self.fetches else 0
+
+    @property
+    def avg_payload_kb(self):
+        return self.payload_bytes / 1024.0 / self.fetches if self.fetches else 0
+
+
+class PlaybackTrace(database.Model):
+    session_id = peewee.CharField(index=True)
+    addon_id = peewee.CharField()
+    stage = peewee.CharField()
+    start = peewee.FloatField()
+    duration = peewee.FloatField()
+    created = peewee.IntegerField()
+
+    class Meta:
+        table_name = 'playback_trace'
+
+
+profile_path = xbmc.translatePath(COMMON_ADDON.getAddonInfo('profile'))
+db_path = os.path.join(profile_path, 'stats.db')
+
+_counters = defaultdict(lambda: defaultdict(int))
+_lock = threading.Lock()
+_trace = deque(maxlen=TRACE_MAX_STAGES)
+
+
+def enabled():
+    return settings.common_settings.getBool('cache_stats', False)
+
+
+def record(cache, func, **counts):
+    if not enabled():
+        return
+
+    with _lock:
+        row = _counters[(cache, func)]
+        for key in counts:
+            row[key] += counts[key]
+
+
+@signals.on(signals.AFTER_DISPATCH)
+def flush():
+    with _lock:
+        counters = dict(_counters)
+        _counters.clear()
+
+    if not counters:
+        return
+
+    now = int(time())
+    try:
+        with CacheStats._meta.database.atomic():
+            for (cache, func), counts in counters.items():
+                where = (CacheStats.addon_id == ADDON_ID, CacheStats.cache == cache, CacheStats.func == func)
+                updates = {getattr(CacheStats, key): getattr(CacheStats, key) + counts[key] for key in counts}
+                updates[CacheStats.updated] = now
+                if not CacheStats.update(updates).where(*where).execute():
+                    CacheStats.insert(addon_id=ADDON_ID, cache=cache, func=func, updated=now, **counts).execute()
+    except Exception as e:
+        log.debug('Cache Stats: Failed to save: {}'.format(e))
+
+
+def get_addon_ids():
+    return [x.addon_id for x in CacheStats.select(CacheStats.addon_id).distinct()]
+
+
+def get_rows(addon_id):
+    rows = list(CacheStats.select().where(CacheStats.addon_id == addon_id))
+    return sorted(rows, key=lambda row: row.lookups, reverse=True)
+
+
+def reset(addon_id=None):
+    if addon_id:
+        return CacheStats.delete_where(CacheStats.addon_id == addon_id)
+    else:
+        return CacheStats.truncate()
+
+
+def trace_enabled():
+    return settings.common_settings.getBool('playback_trace', False)
+
+
+def trace(stage, start, end=None):
+    _trace.append((stage, start, (end or time()) - start))
+
+
+def get_trace():
+    return list(_trace)
+
+
+@signals.on(signals.BEFORE_DISPATCH)
+def clear_trace():
+    _trace.clear()
+
+
+def save_trace(session_id, addon_id, stages):
+    if not stages:
+        return
+
+    first = min(stage[1] for stage in stages)
+    now = int(time())
+    rows = [{'session_id': session_id, 'addon_id': addon_id, 'stage': stage, 'start': start - first, 'duration': duration, 'created': now}
+        for stage, start, duration in stages]
+
+    with PlaybackTrace._meta.database.atomic():
+        PlaybackTrace.delete_where(PlaybackTrace.session_id == session_id)
+        PlaybackTrace.insert_many(rows).execute()
+
+        keep = PlaybackTrace.select(PlaybackTrace.session_id).group_by(PlaybackTrace.session_id).order_by(peewee.fn.MAX(PlaybackTrace.id).desc()).limit(TRACE_MAX_SESSIONS)
+        PlaybackTrace.delete_where(PlaybackTrace.session_id.not_in(keep))
+
+
+def get_traces():
+    query = PlaybackTrace.select(PlaybackTrace.session_id, PlaybackTrace.addon_id, peewee.fn.MAX(PlaybackTrace.created).alias('created'),
+        peewee.fn.MAX(PlaybackTrace.start + PlaybackTrace.duration).alias('total')).group_by(PlaybackTrace.session_id).order_by(peewee.fn.MAX(PlaybackTrace.id).desc())
+    return list(query)
+
+
+def get_trace_rows(session_id):
+    return list(PlaybackTrace.select().where(PlaybackTrace.session_id == session_id).order_by(PlaybackTrace.start))
+
+
+def reset_traces():
+    return PlaybackTrace.truncate()
+
+
+signals.add(signals.ON_EXIT, flush)
+db = database.init([CacheStats, PlaybackTrace], db_path, reset=False)
@@ -1,33 +1,99 @@
 from copy import deepcopy
-from slyguy import settings
+from slyguy import settings, signals, log
 from slyguy.constants import USERDATA_KEY
 
 
+DELETED = object()
+
+class Store(object):
+    data = None
+    loaded = None
+    changes = {}
+    cleared = False
+    dispatching = False
+
+store = Store()
+
+@signals.on(signals.BEFORE_DISPATCH)
+def load():
+    store.data = None
+    store.changes = {}
+    store.cleared = False
+    store.dispatching = True
+
+@signals.on(signals.AFTER_DISPATCH)
+def flush():
+    store.dispatching = False
+    if store.cleared or store.changes:
+        _flush()
+    store.data = store.loaded = None
+
+# write pending changes now so another invocation (refresh, redirect, run_plugin) sees them
+def save():
+    if store.cleared or store.changes:
+        _flush()
+        store.loaded = deepcopy(store.data)
+
 def _get_data():
-    return deepcopy(settings.getDict(USERDATA_KEY, {}))
+    if not store.dispatching:
+        # long running (service, proxy). reload if a plugin process has written since
+        settings.check_changed()
+        store.data = None
+
+    if store.data is None:
+        store.loaded = settings.getDict(USERDATA_KEY, {})
+        store.data = deepcopy(store.loaded)
+    return store.data
+
+def _flush(merge=True):
+    if merge and store.loaded is not None:
+        # pick up writes from other processes since we loaded
+        settings.reset()
+        current = settings.getDict(USERDATA_KEY, {})
+        if current != store.loaded:
+            log.debug('Userdata changed by another process. Merging')
+            data = {} if store.cleared else deepcopy(current)
+            for key, value in store.changes.items():
+                if value is DELETED:
+                    data.pop(key, None)
+                else:
+                    data[key] = value
+            store.data = data
+
+    settings.setDict(USERDATA_KEY, store.data)
+    store.changes = {}
+    store.cleared = False
+
+def _save():
+    # outside of a dispatch (service, proxy) write straight through
+    if not store.dispatching:
+        _flush(merge=False)
+        store.data = store.loaded = None
 
 def get(key, default=None):
-    return _get_data().get(key, default)
+    return deepcopy(_get_data().get(key, default))
 
 def set(key, value):
-    data = _get_data()
-    data[key] = value
-    _set_data(data)
-
-def _set_data(data):
-    settings.setDict(USERDATA_KEY, data)
+    value = deepcopy(value)
+    _get_data()[key] = value
+    store.changes[key] = value
+    _save()
 
 def pop(key, default=None):
-    data = _get_data()
-    value = data.pop(key, default)
-    _set_data(data)
+    value = _get_data().pop(key, default)
+    store.changes[key] = DELETED
+    _save()
     return value
 
 def delete(key):
     data = _get_data()
     if key in data:
         del data[key]
-        _set_data(data)
-    
+        store.changes[key] = DELETED
+        _save()
+
 def clear():
-    _set_data({})
+    _get_data().clear()
+    store.changes = {}
+    store.cleared = True
+    _save()
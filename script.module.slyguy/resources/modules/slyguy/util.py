@@ -11,9 +11,11 @@ import io
 import gzip
 import re
 import threading
+import itertools
 import socket
 import binascii
 from contextlib import closing
+from time import time
 
 import requests
 from kodi_six import xbmc, xbmcgui, xbmcaddon, xbmcvfs
@@ -36,12 +38,16 @@ else:
     from six.moves.html_parser import HTMLParser
     html = HTMLParser()
 
-from slyguy import log, _
-from slyguy.exceptions import Error
+from slyguy import log, signals, _
+from slyguy.exceptions import Error, TaskTimeoutError
 from slyguy.constants import *
 
 
 def run_plugin(path, wait=False):
+    from slyguy import userdata, cache
+    userdata.save()
+    cache.flush()
+
     if wait:
         dirs, files = xbmcvfs.listdir(path)
         return dirs, files
@@ -86,53 +92,162 @@ def kodi_db(name):
     else:
         return None
 
-def async_tasks(tasks, workers=DEFAULT_WORKERS, raise_on_error=True):
-    def worker():
-        while not task_queue.empty():
-            task, index = task_queue.get_nowait()
-            try:
-                resp_queue.put([task(), index])
-            except Exception as e:
-                resp_queue.put([e, index])
-            finally:
-                task_queue.task_done()
-
-    task_queue = queue.Queue()
-    resp_queue = queue.Queue()
+class _Task(object):
+    def __init__(self, func, index, done):
+        self.func = func
+        self.index = index
+        self.done = done
+        self.started = None
+        self.cancelled = False
 
-    for i in range(len(tasks)):
-        task_queue.put([tasks[i], i])
+    def run(self):
+        if self.cancelled:
+            return
 
-    threads = []
-    num_workers = min(workers, len(tasks))
-    log.debug('Starting {} workers'.format(num_workers))
-    for i in range(num_workers):
-        thread = threading.Thread(target=worker)
+        self.started = time()
+        try:
+            result = self.func()
+        except Exception as e:
+            result = e
+        self.done.put([result, self.index, self])
+
+class WorkerPool(object):
+    def __init__(self, max_workers=MAX_WORKERS, idle_timeout=WORKER_IDLE_TIMEOUT):
+        self._max_workers = max_workers
+        self._idle_timeout = idle_timeout
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads = []
+        self._idle = 0
+        self._stopping = 0
+
+    def in_worker(self):
+        return getattr(self._local, 'worker', False)
+
+    def submit(self, task, priority=TASK_PRIORITY_NORMAL):
+        self._queue.put((priority, next(self._counter), task))
+        with self._lock:
+            if self._queue.qsize() - self._stopping > self._idle and len(self._threads) < self._max_workers:
+                self._spawn()
+
+    def release(self):
+        # kodi waits for all threads before ending the plugin interpreter
+        with self._lock:
+            for i in range(len(self._threads) - self._stopping):
+                self._queue.put((float('inf'), next(self._counter), None))
+                self._stopping += 1
+
+    def _spawn(self):
+        thread = threading.Thread(target=self._worker)
         thread.daemon = True
+        self._threads.append(thread)
         thread.start()
-        threads.append(thread)
-
-    results = []
-    exception = None
-    for i in range(len(tasks)):
-        result = resp_queue.get()
-
-        if raise_on_error and isinstance(result[0], Exception):
-            with task_queue.mutex:
-                task_queue.queue.clear()
+        log.debug('Started worker {}/{}'.format(len(self._threads), self._max_workers))
 
-            exception = result[0]
-            break
+    def _worker(self):
+        self._local.worker = True
+        while True:
+            with self._lock:
+                self._idle += 1
+            try:
+                item = self._queue.get(timeout=self._idle_timeout)
+            except queue.Empty:
+                item = None
+            task = item[2] if item else None
+            with self._lock:
+                self._idle -= 1
+                if item and task is None:
+                    self._stopping -= 1
+                if task is None:
+                    self._threads.remove(threading.current_thread())
+                    # a task may have been submitted while we were exiting. queued stop markers dont count
+                    if self._queue.qsize() > self._stopping:
+                        self._spawn()
+                    return
+            task.run()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
+
+@signals.on(signals.AFTER_DISPATCH)
+def release_pool():
+    if _pool is not None:
+        _pool.release()
+
+def as_completed(tasks, workers=DEFAULT_WORKERS, raise_on_error=True, priority=TASK_PRIORITY_NORMAL, timeout=None):
+    tasks = list(tasks)
+    pool = get_pool()
+
+    # a task fanning out again would wait on workers that are waiting on it
+    if pool.in_worker():
+        for index, func in enumerate(tasks):
+            try:
+                result = func()
+            except Exception as e:
+                if raise_on_error:
+                    raise
+                result = e
+            yield index, result
+        return
 
-        results.append(result)
+    done = queue.Queue()
+    pending = {}
+    next_index = 0
+    try:
+        while next_index < len(tasks) or pending:
+            while next_index < len(tasks) and len(pending) < workers:
+                task = pending[next_index] = _Task(tasks[next_index], next_index, done)
+                pool.submit(task, priority)
+                next_index += 1
+
+            if timeout is None:
+                result, index, task = done.get()
+            else:
+                now = time()
+                expired = [x for x in pending.values() if x.started and now - x.started >= timeout]
+                for task in expired:
+                    task.cancelled = True
+                    pending.pop(task.index)
+                    error = TaskTimeoutError(_(_.TASK_TIMEOUT, timeout=timeout))
+                    if raise_on_error:
+                        raise error
+                    yield task.index, error
+
+                if expired:
+                    continue
+
+                wait = min([x.started + timeout - now for x in pending.values() if x.started] or [timeout])
+                try:
+                    result, index, task = done.get(timeout=max(wait, 0.01))
+                except queue.Empty:
+                    continue
+
+            # result from a task we already timed out
+            if pending.pop(index, None) is None:
+                continue
 
-    for thread in threads:
-        thread.join()
+            if raise_on_error and isinstance(result, Exception):
+                raise result
 
-    if exception:
-        raise exception
+            yield index, result
+    finally:
+        for task in pending.values():
+            task.cancelled = True
 
-    return [x[0] for x in sorted(results, key=lambda x: x[1])]
+def async_tasks(tasks, workers=DEFAULT_WORKERS, raise_on_error=True, priority=TASK_PRIORITY_NORMAL, timeout=None):
+    results = [None] * len(tasks)
+    for index, result in as_completed(tasks, workers=workers, raise_on_error=raise_on_error, priority=priority, timeout=timeout):
+        results[index] = result
+    return results
 
 def get_addon(addon_id, required=False, install=True):
     try:
@@ -1,7 +1,8 @@
 import uuid
+import threading
 from time import time
 
-from slyguy import userdata, mem_cache
+from slyguy import userdata, mem_cache, cache
 from slyguy.session import Session
 from slyguy.exceptions import Error
 
@@ -23,10 +24,14 @@ ERROR_MAP = {
 
 
 class API(object):
-    def new_session(self):
-        self._session = Session(HEADERS, timeout=30)
+    def new_session(self, reuse=False):
+        if reuse and getattr(self, '_session', None):
+            self._session.headers.pop('Authorization', None)
+        else:
+            self._session = Session(HEADERS, timeout=30)
         self.logged_in = userdata.get('refresh_token') != None
         self._cache = {}
+        self._token_lock = threading.Lock()
 
     @mem_cache.cached(60*60, key='config')
     def get_config(self):
@@ -48,6 +53,10 @@ class API(object):
         self._session.headers.update({'x-bamsdk-transaction-id': self._transaction_id()})
 
     def _set_token(self, force=False):
+        with self._token_lock:
+            self._refresh_token()
+
+    def _refresh_token(self):
         if self._cache.get('access_token') and self._cache.get('feature_flags'):
             self._set_authentication(self._cache['access_token'])
             return
@@ -70,6 +79,7 @@ class API(object):
     def _set_auth(self, sdk):
         self._cache['feature_flags'] = sdk['featureFlags']
         self._cache['access_token'] = sdk['token']['accessToken']
+        self._cache['token_expires'] = time() + sdk['token'].get('expiresIn', 0)
         self._set_authentication(self._cache['access_token'])
         userdata.set('refresh_token', sdk['token']['refreshToken'])
 
@@ -223,9 +233,13 @@ class API(object):
 
         return error_msg
 
-    def _json_call(self, endpoint, **kwargs):
+    def _json_call(self, endpoint, cache_ttl=None, **kwargs):
         self._set_token()
-        data = self._session.get(endpoint, **kwargs).json()
+        if cache_ttl is not None:
+            kwargs['cache_vary'] = self._cache_vary()
+            kwargs['cache_validate'] = lambda resp: not self._check_errors(resp.json(), raise_on_error=False)
+
+        data = self._session.get(endpoint, cache_ttl=cache_ttl, **kwargs).json()
         self._check_errors(data)
         return data
 
@@ -313,10 +327,30 @@ class API(object):
 
         return href.format(apiVersion=api_version)
 
-    def profile(self):
+    def _cache_vary(self):
+        profile = self._cache.get('profile')
+        return userdata.get('profile_id') or (profile['id'] if profile else None)
+
+    def prefetch_profile(self):
+        cache.delete(PREFETCH_PROFILE_KEY)
+        profile, session = self.profile()
+        # session data is only reused while the token it was fetched with is valid
+        expires = min(PREFETCH_TTL, int(self._cache.get('token_expires', 0) - time()))
+        if expires > 0:
+            cache.set(PREFETCH_PROFILE_KEY, {'profile_id': userdata.get('profile_id'), 'profile': profile, 'session': session}, expires=expires, immediate=True)
+
+    def profile(self, prefetched=False):
         session = self._cache.get('session')
         profile = self._cache.get('profile')
 
+        if prefetched and (not session or not profile):
+            prefetched = cache.get(PREFETCH_PROFILE_KEY)
+            if prefetched:
+                cache.delete(PREFETCH_PROFILE_KEY)
+                if prefetched['profile_id'] == userdata.get('profile_id'):
+                    self._cache['session'] = session = prefetched['session']
+                    self._cache['profile'] = profile = prefetched['profile']
+
         if not session or not profile:
             data = self.account()
 
@@ -343,7 +377,7 @@ class API(object):
 
     def video_bundle(self, family_id):
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints']['getDmcVideoBundle']['href'], encodedFamilyId=family_id)
-        return self._json_call(endpoint)['data']['DmcVideoBundle']
+        return self._json_call(endpoint, cache_ttl=CACHE_TTL_CONTENT)['data']['DmcVideoBundle']
 
     def up_next(self, content_id):
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints']['getUpNext']['href'], contentId=content_id)
@@ -364,7 +398,7 @@ class API(object):
 
     def collection_by_slug(self, slug, content_class, sub_type='StandardCollection'):
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints']['getCollection']['href'], collectionSubType=sub_type, contentClass=content_class, slug=slug)
-        return self._json_call(endpoint)['data']['Collection']
+        return self._json_call(endpoint, cache_ttl=CACHE_TTL_SETS if sub_type == 'StandardCollection' else None)['data']['Collection']
 
     def set_by_id(self, set_id, set_type, page=1, page_size=PAGE_SIZE_SETS):
         if set_type == 'ContinueWatchingSet':
@@ -375,19 +409,19 @@ class API(object):
             endpoint = 'getSet'
 
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints'][endpoint]['href'], setType=set_type, setId=set_id, pageSize=page_size, page=page)
-        return self._json_call(endpoint)['data'][set_type]
+        return self._json_call(endpoint, cache_ttl=None if set_type in NO_CACHE_SET_TYPES else CACHE_TTL_SETS)['data'][set_type]
 
     def video(self, content_id):
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints']['getDmcVideo']['href'], contentId=content_id)
-        return self._json_call(endpoint)['data']['DmcVideo']
+        return self._json_call(endpoint, cache_ttl=CACHE_TTL_CONTENT)['data']['DmcVideo']
 
     def series_bundle(self, series_id):
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints']['getDmcSeriesBundle']['href'], encodedSeriesId=series_id)
-        return self._json_call(endpoint)['data']['DmcSeriesBundle']
+        return self._json_call(endpoint, cache_ttl=CACHE_TTL_CONTENT)['data']['DmcSeriesBundle']
 
     def episodes(self, season_id, page=1, page_size=PAGE_SIZE_CONTENT):
         endpoint = self._endpoint(self.get_config()['services']['content']['client']['endpoints']['getDmcEpisodes']['href'], seasonId=season_id, pageSize=page_size, page=page)
-        return self._json_call(endpoint)['data']['DmcEpisodes']
+        return self._json_call(endpoint, cache_ttl=CACHE_TTL_CONTENT)['data']['DmcEpisodes']
 
     def update_resume(self, media_id, fguid, playback_time):
         self._set_token()
@@ -485,23 +519,21 @@ class API(object):
             'enhancedContainersLimit': 0,
         }
         endpoint = self._endpoint(self.get_config()['services']['explore']['client']['endpoints']['getPage']['href'], version=EXPLORE_VERSION, pageId=page_id)
-        return self._json_call(endpoint, params=params)['data']['page']
+        return self._json_call(endpoint, params=params, cache_ttl=CACHE_TTL_SETS)['data']['page']
 
     def explore_set(self, set_id, page=1):
-        params = {
-            'limit': 999,
-            'offset': 30*(page-1),
-        }
-        endpoint = self._endpoint(self.get_config()['services']['explore']['client']['endpoints']['getSet']['href'], version=EXPLORE_VERSION, setId=set_id)
-        return self._json_call(endpoint, params=params)['data']['set']
+        return self._explore_window('getSet', 'set', CACHE_TTL_SETS, page, setId=set_id)
 
     def explore_season(self, season_id, page=1):
+        return self._explore_window('getSeason', 'season', CACHE_TTL_CONTENT, page, seasonId=season_id)
+
+    def _explore_window(self, endpoint_name, key, cache_ttl, page=1, **kwargs):
         params = {
-            'limit': 999,
-            'offset': 30*(page-1),
+            'limit': EXPLORE_WINDOW,
+            'offset': EXPLORE_WINDOW*(page-1),
         }
-        endpoint = self._endpoint(self.get_config()['services']['explore']['client']['endpoints']['getSeason']['href'], version=EXPLORE_VERSION, seasonId=season_id)
-        return self._json_call(endpoint, params=params)['data']['season']
+        endpoint = self._endpoint(self.get_config()['services']['explore']['client']['endpoints'][endpoint_name]['href'], version=EXPLORE_VERSION, **kwargs)
+        return self._json_call(endpoint, params=params, cache_ttl=cache_ttl)['data'][key]
 
     def explore_search(self, query):
         params = {
@@ -523,7 +555,7 @@ class API(object):
             'refIdType': 'encodedFamilyId',
         }
         endpoint = self._endpoint(self.get_config()['services']['explore']['client']['endpoints']['getDeeplink']['href'], version=EXPLORE_VERSION)
-        return self._json_call(endpoint, params=params)['data']['deeplink']['actions'][0]['pageId'].replace('entity-','')
+        return self._json_call(endpoint, params=params, cache_ttl=CACHE_TTL_CONTENT)['data']['deeplink']['actions'][0]['pageId'].replace('entity-','')
 
     def explore_playback(self, resource_id, wv_secure=False):
         self._set_token()
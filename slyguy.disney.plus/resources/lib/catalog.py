@@ -0,0 +1,132 @@
+import os
+import re
+import json
+from time import time
+
+import peewee
+
+from slyguy import database, log
+from slyguy.util import chunked
+from slyguy.constants import ADDON_PROFILE
+
+from .constants import CATALOG_SEARCH_LIMIT, CATALOG_RECRAWL
+
+FTS_SQL = 'CREATE VIRTUAL TABLE IF NOT EXISTS catalog_search USING fts5(profile_id UNINDEXED, item_id UNINDEXED, title, genres, description)'
+FTS_DELETE_SQL = 'DELETE FROM catalog_search WHERE profile_id = ? AND item_id IN ({})'
+FTS_INSERT_SQL = 'INSERT INTO catalog_search (profile_id, item_id, title, genres, description) VALUES (?, ?, ?, ?, ?)'
+FTS_SEARCH_SQL = 'SELECT i.row FROM catalog_search f JOIN catalog_items i ON i.profile_id = f.profile_id AND i.item_id = f.item_id WHERE catalog_search MATCH ? AND f.profile_id = ? ORDER BY f.rank LIMIT ?'
+
+_state = {'fts': None}
+
+
+class CatalogItem(database.Model):
+    profile_id = peewee.TextField()
+    item_id = peewee.TextField()
+    title = peewee.TextField()
+    genres = peewee.TextField()
+    description = peewee.TextField()
+    row = database.JSONField()
+    updated = peewee.IntegerField()
+
+    class Meta:
+        primary_key = peewee.CompositeKey('profile_id', 'item_id')
+        table_name = 'catalog_items'
+
+
+class CatalogSet(database.Model):
+    profile_id = peewee.TextField()
+    set_id = peewee.TextField()
+    seen = peewee.TextField(null=True)
+    crawled_signature = peewee.TextField(null=True)
+    crawled = peewee.IntegerField(default=0)
+
+    class Meta:
+        primary_key = peewee.CompositeKey('profile_id', 'set_id')
+        table_name = 'catalog_sets'
+
+
+db_path = os.path.join(ADDON_PROFILE, 'catalog.db')
+db = database.init([CatalogItem, CatalogSet], db_path)
+
+
+def _fts():
+    if _state['fts'] is None:
+        try:
+            db.execute_sql(FTS_SQL)
+            _state['fts'] = True
+        except Exception as e:
+            log.debug('Catalog: FTS5 not available, using LIKE search: {}'.format(e))
+            _state['fts'] = False
+    return _state['fts']
+
+
+def _parse_row(row):
+    visuals = row.get('visuals') or {}
+    actions = row.get('actions') or []
+    if not row.get('id') or not visuals.get('title') or not actions or actions[0]['type'] not in ('browse', 'legacyBrowse'):
+        return None
+
+    genres = visuals.get('metastringParts', {}).get('genres', {}).get('values', [])
+    description = visuals.get('description', {}).get('full', '')
+    return row['id'], visuals['title'], u' '.join(genres), description, row
+
+
+def add_rows(rows, profile_id):
+    items = [x for x in [_parse_row(row) for row in rows] if x]
+    if not items:
+        return 0
+
+    now = int(time())
+    data = [{'profile_id': profile_id, 'item_id': x[0], 'title': x[1], 'genres': x[2], 'description': x[3], 'row': x[4], 'updated': now} for x in items]
+    with db.atomic():
+        for batch in chunked(data, 100):
+            CatalogItem.insert_many(batch).on_conflict_replace().execute()
+
+        if _fts():
+            for batch in chunked(items, 100):
+                db.execute_sql(FTS_DELETE_SQL.format(','.join('?'*len(batch))), [profile_id] + [x[0] for x in batch])
+            for item in items:
+                db.execute_sql(FTS_INSERT_SQL, [profile_id] + list(item[:4]))
+
+    return len(items)
+
+
+def set_signature(row):
+    return u'{}'.format(row.get('pagination', {}).get('totalCount', ''))
+
+
+def add_sets(rows, profile_id):
+    sets = [(row['id'], set_signature(row)) for row in rows if row.get('type') == 'set' and row.get('id')]
+    if not sets:
+        return
+
+    with db.atomic():
+        for set_id, signature in sets:
+            CatalogSet.insert(profile_id=profile_id, set_id=set_id, seen=signature).on_conflict_ignore().execute()
+            CatalogSet.update(seen=signature).where((CatalogSet.profile_id == profile_id) & (CatalogSet.set_id == set_id)).execute()
+
+
+def mark_crawled(set_id, signature, profile_id):
+    CatalogSet.set(profile_id=profile_id, set_id=set_id, seen=signature, crawled_signature=signature, crawled=int(time()))
+
+
+def next_sets(limit, profile_id):
+    stale = CatalogSet.crawled_signature.is_null() | (CatalogSet.crawled_signature != CatalogSet.seen) | (CatalogSet.crawled < int(time()) - CATALOG_RECRAWL)
+    query = CatalogSet.select(CatalogSet.set_id).where((CatalogSet.profile_id == profile_id) & stale).order_by(CatalogSet.crawled).limit(limit)
+    return [row.set_id for row in query]
+
+
+def search(query, profile_id, limit=CATALOG_SEARCH_LIMIT):
+    words = re.findall(r'\w+', query, re.UNICODE)
+    if not words:
+        return []
+
+    if _fts():
+        match = u' '.join(u'"{}"*'.format(word) for word in words)
+        return [json.loads(row[0]) for row in db.execute_sql(FTS_SEARCH_SQL, (match, profile_id, limit)).fetchall()]
+
+    where = CatalogItem.profile_id == profile_id
+    for word in words:
+        where &= CatalogItem.title.contains(word) | CatalogItem.genres.contains(word) | CatalogItem.description.contains(word)
+
+    return [row.row for row in CatalogItem.select(CatalogItem.row).where(where).order_by(CatalogItem.title).limit(limit)]
@@ -7,9 +7,19 @@ CONFIG_URL = 'https://bam-sdk-configs.bamgrid.com/bam-sdk/v5.0/{}/android/v{}/go
 DEVICE_CODE_URL = 'https://www.disneyplus.com/begin'
 PAGE_SIZE_SETS = 15
 PAGE_SIZE_CONTENT = 30
+EXPLORE_WINDOW = 999 # each explore set / season page is the next non-overlapping window of this size
 SEARCH_QUERY_TYPE = 'ge'
 BAM_PARTNER = 'disney'
 EXPLORE_VERSION = 'v1.1' #'v1.3' - 1.3 moves a lot more to explore type
+CACHE_TTL_CONTENT = 60*60 # bundles, episodes. used when response has no cache headers
+CACHE_TTL_SETS = 60*5 # sets, collections, explore pages
+NO_CACHE_SET_TYPES = ['ContinueWatchingSet', 'WatchlistSet']
+PREFETCH_PROFILE_KEY = 'prefetch_profile'
+CATALOG_SEARCH_LIMIT = 50
+CATALOG_CRAWL_INTERVAL = 60*10 # at most one crawl step per interval
+CATALOG_CRAWL_SETS = 2 # sets fetched per crawl step
+CATALOG_RECRAWL = 60*60*24*7 # unchanged sets are recrawled after this long
+PREFETCH_TTL = 60*60*2 # prefetched profile is discarded if the next item isnt played within this time
  
 WATCHLIST_SET_ID = '6f3e3200-ce38-4865-8500-a9f463c1971e'
 WATCHLIST_SET_TYPE = 'WatchlistSet'
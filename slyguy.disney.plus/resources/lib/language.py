@@ -48,6 +48,8 @@ class Language(BaseLanguage):
     DOLBY_ATMOS              = 30052
     PROFILE_SETTINGS         = 30053
     CONTINUE_WATCHING        = 30054
+    FULL_SEASONS             = 30055
+    LOCAL_CATALOG            = 30056
     ASK                      = 32055
     WIDESCREEN               = 21377
 
@@ -1,14 +1,17 @@
 import re
+import math
 from base64 import b64decode
+from time import time
 
 from kodi_six import xbmc
 
-from slyguy import plugin, gui, userdata, signals, inputstream
+from slyguy import plugin, gui, userdata, signals, inputstream, log
 from slyguy.exceptions import PluginError
-from slyguy.constants import KODI_VERSION, NO_RESUME_TAG, ROUTE_RESUME_TAG
+from slyguy.constants import KODI_VERSION, NO_RESUME_TAG, ROUTE_RESUME_TAG, PREFETCH_TAG, TASK_PRIORITY_HIGH, TASK_PRIORITY_LOW
 from slyguy.drm import is_wv_secure
 from slyguy.util import async_tasks
 
+from . import catalog
 from .api import API
 from .constants import *
 from .language import _
@@ -16,10 +19,56 @@ from .settings import settings
 
 api = API()
 
+_catalog_state = {'browsed': False}
+
 @signals.on(signals.BEFORE_DISPATCH)
 def before_dispatch():
-    api.new_session()
+    api.new_session(reuse=settings.getBool('warm_invoker', False))
     plugin.logged_in = api.logged_in
+    _catalog_state['browsed'] = False
+
+@signals.on(signals.AFTER_DISPATCH)
+def crawl_catalog():
+    # only after browse routes. not playback, callbacks or prefetch
+    if not _catalog_state['browsed'] or not api.logged_in:
+        return
+
+    profile_id = userdata.get('profile_id')
+    if not profile_id:
+        return
+
+    now = int(time())
+    if now < userdata.get('catalog_crawled', 0) + CATALOG_CRAWL_INTERVAL:
+        return
+    userdata.set('catalog_crawled', now)
+
+    try:
+        for set_id in catalog.next_sets(CATALOG_CRAWL_SETS, profile_id):
+            data = api.explore_set(set_id)
+            count = catalog.add_rows(data.get('items', []), profile_id)
+            catalog.mark_crawled(set_id, catalog.set_signature(data), profile_id)
+            log.debug('Catalog: Crawled set {} ({} items)'.format(set_id, count))
+    except Exception as e:
+        log.debug('Catalog: Crawl failed: {}'.format(e))
+
+def _catalog_add(data):
+    # catalog is per profile so kids profiles never search titles indexed by another profile
+    profile_id = userdata.get('profile_id')
+    if not settings.getBool('local_catalog', False) or not profile_id:
+        return
+
+    _catalog_state['browsed'] = True
+    try:
+        rows = data.get('containers') or []
+        catalog.add_sets(rows, profile_id)
+        for row in rows:
+            catalog.add_rows(row.get('items', []), profile_id)
+        catalog.add_rows(data.get('items', []), profile_id)
+    except Exception as e:
+        log.debug('Catalog: Failed to add rows: {}'.format(e))
+
+def _route_vary():
+    return u'{}{}{}'.format(userdata.get('profile_id'), settings.getBool('sync_watchlist', True), settings.getBool('full_seasons', False))
 
 @plugin.route('')
 def index(**kwargs):
@@ -116,7 +165,7 @@ def _email_password():
         api.login(email, password, token)
         return True
 
-@plugin.route()
+@plugin.route(snapshot=CACHE_TTL_CONTENT, cache_vary=_route_vary)
 def hubs(**kwargs):
     folder = plugin.Folder(_.HUBS)
 
@@ -192,9 +241,10 @@ def _switch_profile(profile):
     userdata.set('avatar', profile['_avatar'])
     userdata.set('profile', profile['name'])
     userdata.set('profile_id', profile['id'])
+    plugin.clear_route_cache()
     gui.notification(_.PROFILE_ACTIVATED, heading=profile['name'], icon=profile['_avatar'])
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_SETS, snapshot=CACHE_TTL_SETS, cache_vary=_route_vary)
 def collection(slug, content_class, label=None, **kwargs):
     data = api.collection_by_slug(slug, content_class, 'PersonalizedCollection' if slug == 'home' else 'StandardCollection')
     folder = plugin.Folder(label or _get_text(data, 'title', 'collection'), thumb=_get_art(data).get('fanart'))
@@ -239,16 +289,16 @@ def collection(slug, content_class, label=None, **kwargs):
 
     return folder
 
-@plugin.route()
+@plugin.route(snapshot=CACHE_TTL_SETS, cache_vary=_route_vary)
 def watchlist(**kwargs):
     #TODO: if api.feature_flags().get('wpnx-disney-watchlistOnExplore'):
     return _sets(set_id=WATCHLIST_SET_ID, set_type=WATCHLIST_SET_TYPE, **kwargs)
 
-@plugin.route()
+@plugin.route(snapshot=CACHE_TTL_SETS, cache_vary=_route_vary)
 def continue_watching(**kwargs):
     return _sets(set_id=CONTINUE_WATCHING_SET_ID, set_type=CONTINUE_WATCHING_SET_TYPE, **kwargs)
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_SETS, cache_vary=_route_vary)
 def sets(**kwargs):
     return _sets(**kwargs)
 
@@ -312,10 +362,12 @@ def _process_rows(rows, content_class=None):
 def add_watchlist(ref_type, ref_id, title=None, icon=None, **kwargs):
     gui.notification(_.ADDED_WATCHLIST, heading=title, icon=icon)
     api.add_watchlist(ref_type, ref_id)
+    plugin.clear_route_cache()
 
 @plugin.route()
 def delete_watchlist(ref_type, ref_id, **kwargs):
     api.delete_watchlist(ref_type, ref_id)
+    plugin.clear_route_cache()
     gui.refresh()
 
 def _parse_collection(row):
@@ -529,7 +581,7 @@ def _get_text(row, field, source):
 
     return sorted(candidates, key=lambda x: x[0])[0][1]
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_CONTENT, cache_vary=_route_vary)
 def series(series_id, **kwargs):
     data = api.series_bundle(series_id)
     art = _get_art(data['series'])
@@ -558,19 +610,28 @@ def series(series_id, **kwargs):
 
     return folder
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_CONTENT, cache_vary=_route_vary)
 @plugin.pagination()
 def season(season_id, title, page=1, **kwargs):
     data = api.episodes(season_id, page=page)
+    more_results = (data['meta']['page_size'] + data['meta']['offset']) < data['meta']['hits']
+    videos = data['videos']
+
+    if more_results and int(page) == 1 and settings.getBool('full_seasons', False):
+        pages = int(math.ceil(data['meta']['hits'] / float(data['meta']['page_size'])))
+        tasks = [lambda _page=_page: api.episodes(season_id, page=_page)['videos'] for _page in range(2, pages+1)]
+        for rows in async_tasks(tasks):
+            videos.extend(rows)
+        more_results = False
 
     folder = plugin.Folder(title)
 
-    items = _process_rows(data['videos'], content_class='episode')
+    items = _process_rows(videos, content_class='episode')
     folder.add_items(items)
 
-    return folder, (data['meta']['page_size'] + data['meta']['offset']) < data['meta']['hits']
+    return folder, more_results
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_CONTENT, cache_vary=_route_vary)
 def suggested(family_id=None, series_id=None, **kwargs):
     if family_id:
         data = api.video_bundle(family_id)
@@ -596,7 +657,7 @@ def play_trailer(family_id=None, series_id=None, **kwargs):
 
     return _play(videos[0]['contentId'])
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_CONTENT, cache_vary=_route_vary)
 def extras(family_id=None, series_id=None, **kwargs):
     if family_id:
         data = api.video_bundle(family_id)
@@ -625,20 +686,49 @@ def full_details(family_id=None, series_id=None, **kwargs):
 @plugin.route()
 @plugin.search()
 def search(query, page, **kwargs):
+    profile_id = userdata.get('profile_id')
+    if not settings.getBool('local_catalog', False) or not profile_id:
+        return _live_search(query), False
+
+    items = _process_explore({'type': 'set', 'visuals': {'title': query}, 'items': catalog.search(query, profile_id)}).items
+    try:
+        live_items = _live_search(query)
+    except Exception as e:
+        if not items:
+            raise
+        log.debug('Catalog: Live search failed: {}'.format(e))
+        live_items = []
+
+    paths = set(item.path for item in items)
+    items.extend([item for item in live_items if item.path not in paths])
+    return items, False
+
+def _live_search(query):
     if api.feature_flags().get('wpnx-disney-searchOnExplore'):
         data = api.explore_search(query)
-        return _process_explore(data['containers'][0]).items if data['containers'] else [], False
+        if data['containers']:
+            _catalog_add(data)
+        return _process_explore(data['containers'][0]).items if data['containers'] else []
     else:
         data = api.search(query)
         hits = [x['hit'] for x in data['hits']]
-        return _process_rows(hits), False
+        return _process_rows(hits)
 
 @plugin.route()
 @plugin.login_required()
 def play(family_id=None, content_id=None, **kwargs):
     return _play(family_id, content_id, **kwargs)
 
+def _prefetch(family_id=None, content_id=None):
+    start = time()
+    tasks = [lambda: api.video_bundle(family_id) if family_id else api.video(content_id), api.prefetch_profile]
+    async_tasks(tasks, priority=TASK_PRIORITY_LOW)
+    log.debug('Prefetch: took {:.2f}s'.format(time() - start))
+
 def _play(family_id=None, content_id=None, **kwargs):
+    if kwargs.get(PREFETCH_TAG):
+        return _prefetch(family_id, content_id)
+
     if KODI_VERSION > 18:
         ver_required = '2.6.0'
     else:
@@ -654,6 +744,8 @@ def _play(family_id=None, content_id=None, **kwargs):
     if not ia.check() or not inputstream.require_version(ver_required):
         gui.ok(_(_.IA_VER_ERROR, kodi_ver=KODI_VERSION, ver_required=ver_required))
 
+    # use the profile prefetched while the previous item was playing
+    api.profile(prefetched=True)
     if family_id:
         data = api.video_bundle(family_id)
     else:
@@ -681,12 +773,25 @@ def _play(family_id=None, content_id=None, **kwargs):
         else:
             imax = True if deault_ratio == RATIO_IMAX else False
 
+        # already loaded by the video lookup
         profile = api.profile()[0]
         if imax != profile['attributes']['playbackSettings']['preferImaxEnhancedVersion']:
             api.set_imax(imax)
 
+    if video['programType'] == 'episode':
+        play_next = settings.getBool('play_next_episode', True)
+    else:
+        play_next = settings.getBool('play_next_movie', False)
+
     playback_url = video['mediaMetadata']['playbackUrls'][0]['href']
-    playback_data = api.playback_data(playback_url, ia.wv_secure)
+    tasks = [lambda: api.playback_data(playback_url, ia.wv_secure)]
+    if play_next:
+        tasks.append(lambda: api.up_next(video['contentId']))
+
+    start = time()
+    results = async_tasks(tasks, priority=TASK_PRIORITY_HIGH)
+    playback_data = results[0]
+    log.debug('Play: playback data and up next took {:.2f}s'.format(time() - start))
 
     try:
         #v6
@@ -731,18 +836,18 @@ def _play(family_id=None, content_id=None, **kwargs):
         if tag_end:
             item.play_skips.append({'from': tag_end, 'to': 0})
 
-    if video['programType'] == 'episode' and settings.getBool('play_next_episode', True):
-        data = api.up_next(video['contentId'])
-        for row in data.get('items', []):
+    if play_next and video['programType'] == 'episode':
+        for row in results[1].get('items', []):
             if row['type'] == 'DmcVideo' and row['programType'] == 'episode' and row['encodedSeriesId'] == video['encodedSeriesId']:
                 item.play_next['next_file'] = _get_play_path(content_id=row['contentId'])
+                item.play_next['prefetch'] = True
                 break
 
-    elif video['programType'] != 'episode' and settings.getBool('play_next_movie', False):
-        data = api.up_next(video['contentId'])
-        for row in data.get('items', []):
+    elif play_next:
+        for row in results[1].get('items', []):
             if row['type'] == 'DmcVideo' and row['programType'] != 'episode':
                 item.play_next['next_file'] = _get_play_path(content_id=row['contentId'])
+                item.play_next['prefetch'] = True
                 break
 
     if settings.getBool('sync_playback', False):
@@ -780,27 +885,30 @@ def logout(**kwargs):
     userdata.delete('avatar')
     userdata.delete('profile')
     userdata.delete('profile_id')
+    plugin.clear_route_cache()
     gui.refresh()
 
 
 ### EXPLORE ###
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_SETS, cache_vary=_route_vary)
 def explore_page(page_id, **kwargs):
     data = api.explore_page(page_id)
+    _catalog_add(data)
     folder = _process_explore(data)
     # flatten
     if len(folder.items) == 1:
         return plugin.redirect(folder.items[0].path)
     return folder
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_SETS, cache_vary=_route_vary)
 @plugin.pagination()
 def explore_set(set_id, page=1, **kwargs):
     data = api.explore_set(set_id, page=page)
+    _catalog_add(data)
     folder = _process_explore(data)
     return folder, data['pagination']['hasMore']
 
-@plugin.route()
+@plugin.route(cache=CACHE_TTL_CONTENT, cache_vary=_route_vary)
 def explore_season(show_id, season_id, **kwargs):
     data = api.explore_season(season_id)
     folder = _process_explore(data)
@@ -1017,6 +1125,7 @@ def explore_play(page_id=None, resource_id=None, **kwargs):
     if not ia.check() or not inputstream.require_version(ver_required):
         gui.ok(_(_.IA_VER_ERROR, kodi_ver=KODI_VERSION, ver_required=ver_required))
 
+    # playback needs the resource id from the page so these run in order
     if resource_id is None:
         data = api.explore_page(page_id)
         play_action = [x for x in data['actions'] if x['type'] == 'playback'][0]
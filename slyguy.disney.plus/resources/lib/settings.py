@@ -17,6 +17,8 @@ class Settings(CommonSettings):
     SKIP_CREDITS = Bool('skip_credits', _.SKIP_CREDITS, default=True)
     SYNC_WATCHLIST = Bool('sync_watchlist', _.DISNEY_WATCHLIST, default=True)
     SYNC_PLAYBACK = Bool('sync_playback', _.DISNEY_SYNC, default=False)
+    FULL_SEASONS = Bool('full_seasons', _.FULL_SEASONS, default=False)
+    LOCAL_CATALOG = Bool('local_catalog', _.LOCAL_CATALOG, default=False)
     DEFAULT_RATIO = Enum('default_ratio', _.DEFAULT_RATIO, default=Ratio.ASK, loop=True,
                     options=[[_.ASK, Ratio.ASK], [_.IMAX, Ratio.IMAX], [_.WIDESCREEN, Ratio.WIDESCREEN]])
 